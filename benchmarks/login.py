@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Benchmark the `EmailBackend.authenticate` user lookup.
+
+Compare the previous lookup (`validate_email` then a case-sensitive `email=`
+or `username=` query) with the single case-insensitive query, in logins per
+second. A fast password hasher is used so the timing reflects the lookup
+rather than the hashing.
+
+Usage:
+
+    $ python benchmarks/login.py [number of users] [number of logins]
+
+"""
+import os
+import sys
+import time
+
+import django
+
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runtests import DEFAULT_SETTINGS  # noqa
+
+
+def legacy_authenticate(User, username, password):
+    """The lookup used before the single query login path."""
+    from django.core.validators import validate_email
+
+    try:
+        validate_email(username)
+    except Exception:
+        username_is_email = False
+    else:
+        username_is_email = True
+
+    try:
+        if username_is_email:
+            user = User.objects.get(email=username)
+        else:
+            user = User.objects.get(username=username)
+    except User.DoesNotExist:
+        return None
+    if user.check_password(password):
+        return user
+    return None
+
+
+def run(label, authenticate, usernames, password):
+    start = time.perf_counter()
+    for username in usernames:
+        assert authenticate(username, password) is not None
+    elapsed = time.perf_counter() - start
+    print("{:<10} {:>10.0f} logins/s".format(label, len(usernames) / elapsed))
+
+
+def main(user_count=10000, login_count=2000):
+    settings.configure(
+        **dict(
+            DEFAULT_SETTINGS,
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        )
+    )
+    django.setup()
+
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+
+    from cotidia.account.auth import EmailBackend
+    from cotidia.account.models import User
+
+    call_command("migrate", verbosity=0)
+
+    password = "demo1234"
+    hashed = make_password(password)
+    User.objects.bulk_create(
+        User(
+            username="user{}".format(i),
+            email="user{}@example.com".format(i),
+            password=hashed,
+        )
+        for i in range(user_count)
+    )
+
+    step = max(user_count // login_count, 1)
+    usernames = [
+        "user{}@example.com".format(i) for i in range(0, user_count, step)
+    ][:login_count]
+
+    backend = EmailBackend()
+    run("before", lambda u, p: legacy_authenticate(User, u, p), usernames, password)
+    run("after", lambda u, p: backend.authenticate(None, u, p), usernames, password)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
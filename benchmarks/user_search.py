@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Benchmark the user search backends.
+
+Search a synthetic set of users with every backend available on the database,
+in searches per second. The SQLite FTS5 backend is compared with the
+`icontains` scan.
+
+Usage:
+
+    $ python benchmarks/user_search.py [number of users] [number of searches]
+
+"""
+import os
+import random
+import sys
+import time
+
+import django
+
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runtests import DEFAULT_SETTINGS  # noqa
+
+FIRST_NAMES = ["Alice", "Bob", "Chloe", "David", "Emma", "Farid", "Grace", "Hugo"]
+LAST_NAMES = ["Martin", "Smith", "Bernard", "Jones", "Dubois", "Taylor", "Moreau"]
+
+
+def run(label, backend, queryset, terms):
+    start = time.perf_counter()
+    matches = 0
+    for term in terms:
+        matches += len(backend.search(queryset, term)[:20])
+    elapsed = time.perf_counter() - start
+    print(
+        "{:<10} {:>10.0f} searches/s {:>10} matches".format(
+            label, len(terms) / elapsed, matches
+        )
+    )
+
+
+def main(user_count=100000, search_count=200):
+    settings.configure(**DEFAULT_SETTINGS)
+    django.setup()
+
+    from django.core.management import call_command
+
+    from cotidia.account.models import User
+    from cotidia.account.search import IContainsSearch, SQLiteFTSSearch
+
+    call_command("migrate", verbosity=0)
+
+    random.seed(0)
+    User.objects.bulk_create(
+        (
+            User(
+                username="user{}".format(i),
+                email="user{}@example.com".format(i),
+                first_name=random.choice(FIRST_NAMES),
+                last_name="{}{}".format(random.choice(LAST_NAMES), i),
+            )
+            for i in range(user_count)
+        ),
+        batch_size=1000,
+    )
+
+    terms = [
+        random.choice(
+            [
+                "user{}".format(random.randrange(user_count)),
+                random.choice(LAST_NAMES)[:4],
+                "{} {}".format(random.choice(FIRST_NAMES), random.choice(LAST_NAMES)),
+            ]
+        )
+        for _ in range(search_count)
+    ]
+
+    queryset = User.objects.all()
+    run("icontains", IContainsSearch(), queryset, terms)
+    run("fts5", SQLiteFTSSearch(), queryset, terms)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -4,10 +4,56 @@ Custom authentication backends.
 Inspired by http://djangosnippets.org/snippets/2463/
 
 """
+import threading
+
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.db.models.functions import Lower
+
 from cotidia.account.conf import settings
-from django.core.validators import validate_email
-from django.apps import apps
+from cotidia.account.cache import get_cache, get_version, make_key
+from cotidia.account.exceptions import LoginCapacityExceeded
+from cotidia.account.models import ObjectPermission
+
+UserModel = get_user_model()
+
+_hash_semaphore = (None, None)
+_hash_semaphore_lock = threading.Lock()
+
+
+@contextmanager
+def hashing_slot():
+    """
+    Limit the number of password hashes running at once in the process.
+
+    The limit is set by `ACCOUNT_LOGIN_MAX_CONCURRENT_HASHES`. If no slot
+    frees up within `ACCOUNT_LOGIN_HASH_WAIT` seconds, `LoginCapacityExceeded`
+    is raised so the login fails fast instead of queuing up CPU work.
+
+    """
+    global _hash_semaphore
+
+    limit = settings.ACCOUNT_LOGIN_MAX_CONCURRENT_HASHES
+    if not limit:
+        yield
+        return
+
+    with _hash_semaphore_lock:
+        if _hash_semaphore[0] != limit:
+            _hash_semaphore = (limit, threading.BoundedSemaphore(limit))
+        semaphore = _hash_semaphore[1]
+
+    if not semaphore.acquire(timeout=settings.ACCOUNT_LOGIN_HASH_WAIT):
+        raise LoginCapacityExceeded
+    try:
+        yield
+    finally:
+        semaphore.release()
 
 
 class EmailBackend(ModelBackend):
@@ -21,34 +67,153 @@ class EmailBackend(ModelBackend):
     supports_inactive_user = False
 
     def authenticate(self, request=None, username=None, password=None):
-        app_label, model_name = settings.AUTH_USER_MODEL.split(".")
-        User = apps.get_model(app_label, model_name)
+        if username is None or password is None:
+            return None
 
-        try:
-            validate_email(username)
-        except:
-            username_is_email = False
-        else:
-            username_is_email = True
-
-        if username_is_email:
-            try:
-                user = User.objects.get(email=username)
-            except User.DoesNotExist:
-                return None
-        else:
-            try:
-                user = User.objects.get(username=username)
-            except User.DoesNotExist:
+        user = self.get_login_user(username)
+
+        with hashing_slot():
+            if user is None:
+                if settings.ACCOUNT_LOGIN_EQUALISE_TIMING:
+                    # Hash the password anyway, so that an unknown user
+                    # takes as long as a known one.
+                    UserModel().set_password(password)
                 return None
-        if user.check_password(password):
-            return user
+
+            if user.check_password(password):
+                return user
+        return None
+
+    def get_login_user(self, username):
+        """
+        Return the user matching an email or a username, in a single query.
+
+        The email is matched case-insensitively, using the index on
+        `LOWER(email)`. An email match takes precedence over a username match.
+
+        """
+        # An empty username would match the users without an email
+        if not username:
+            return None
+
+        users = list(
+            UserModel._default_manager.annotate(email_lower=Lower("email"))
+            .filter(Q(email_lower=username.lower()) | Q(username=username))
+            .order_by("pk")[:3]
+        )
+
+        for match in [
+            lambda user: user.email == username,
+            lambda user: user.email_lower == username.lower(),
+            lambda user: user.username == username,
+        ]:
+            for user in users:
+                if match(user):
+                    return user
         return None
 
     def get_user(self, user_id):
-        app_label, model_name = settings.AUTH_USER_MODEL.split(".")
-        User = apps.get_model(app_label, model_name)
+        """
+        Return the user for a session.
+
+        Django already memoizes the user for the duration of a request. With
+        `ACCOUNT_CACHE_USERS` enabled, the user is also cached across
+        requests, keyed on its version stamp which is bumped whenever the
+        user, its groups or its permissions change.
+
+        """
+        if not settings.ACCOUNT_CACHE_USERS:
+            return self.load_user(user_id)
+
+        cache = get_cache()
+        key = make_key("user", user_id, get_version("user", user_id))
+
+        user = cache.get(key)
+        if user is None:
+            user = self.load_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.ACCOUNT_USER_CACHE_TIMEOUT)
+        return user
+
+    def get_all_permissions(self, user_obj, obj=None):
+        """
+        Return the permissions of a user, from its groups and its own.
+
+        With `ACCOUNT_CACHE_PERMISSIONS` enabled, the set is cached across
+        requests, keyed on the version stamp of the user and on a global
+        permissions stamp bumped whenever a group or its permissions change.
+
+        """
+        if obj is not None:
+            return self.get_object_permissions(user_obj, obj)
+
+        if not settings.ACCOUNT_CACHE_PERMISSIONS:
+            return super().get_all_permissions(user_obj)
+
+        if not user_obj.is_active or user_obj.is_anonymous:
+            return set()
+
+        if not hasattr(user_obj, "_perm_cache"):
+            cache = get_cache()
+            key = make_key(
+                "perms",
+                user_obj.pk,
+                get_version("user", user_obj.pk),
+                get_version("perms"),
+            )
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, settings.ACCOUNT_PERMISSION_CACHE_TIMEOUT)
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
+
+    def _get_group_permissions(self, user_obj):
+        """
+        Return the permissions of the user groups and of their ancestors,
+        joining the groups through the `GroupClosure` table. The permissions
+        of the user groups don't depend on the closure rows, so groups
+        created before the hierarchy keep their permissions.
+        """
+        return Permission.objects.filter(
+            Q(group__user=user_obj)
+            | Q(group__descendant_links__descendant__user=user_obj)
+        ).distinct()
+
+    def get_object_permissions(self, user_obj, obj):
+        """
+        Return the permissions granted to a user on an object, directly or
+        through its groups, as `app_label.codename` names.
+
+        The result is memoized on the user for the duration of the request.
+        """
+        if not user_obj.is_active or user_obj.is_anonymous or obj.pk is None:
+            return set()
+
+        content_type = ContentType.objects.get_for_model(obj)
+        cache_key = (content_type.pk, obj.pk)
+        if not hasattr(user_obj, "_obj_perm_cache"):
+            user_obj._obj_perm_cache = {}
+
+        if cache_key not in user_obj._obj_perm_cache:
+            perms = (
+                ObjectPermission.objects.filter(
+                    Q(user=user_obj) | Q(group__user=user_obj),
+                    content_type=content_type,
+                    object_id=obj.pk,
+                )
+                .values_list(
+                    "permission__content_type__app_label", "permission__codename"
+                )
+                .order_by()
+            )
+            user_obj._obj_perm_cache[cache_key] = {
+                "{}.{}".format(app_label, codename) for app_label, codename in perms
+            }
+        return user_obj._obj_perm_cache[cache_key]
+
+    def load_user(self, user_id):
         try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
+            return UserModel._default_manager.get(pk=user_id)
+        except UserModel.DoesNotExist:
             return None
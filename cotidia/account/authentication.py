@@ -0,0 +1,52 @@
+from rest_framework.authentication import TokenAuthentication
+
+from cotidia.account.cache import get_cache, make_key
+from cotidia.account.conf import settings
+
+
+def token_cache_key(key):
+    return make_key("token", key)
+
+
+def user_token_cache_key(user_id):
+    return make_key("user-token", user_id)
+
+
+def invalidate_token(key):
+    """Remove a token from the cache."""
+    get_cache().delete(token_cache_key(key))
+
+
+def invalidate_user_tokens(user_ids):
+    """Remove the cached tokens of the given users."""
+    cache = get_cache()
+    keys = [user_token_cache_key(user_id) for user_id in user_ids]
+    token_keys = cache.get_many(keys)
+    cache.delete_many(
+        keys + [token_cache_key(key) for key in token_keys.values()]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication resolving the token through the account cache.
+
+    The token and its user are cached for `ACCOUNT_TOKEN_CACHE_TIMEOUT`
+    seconds, so that repeated calls from the same client don't query the token
+    and user tables. Cached entries are removed when the token is deleted or
+    when the user is saved (password change, deactivation, etc).
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_cache()
+
+        cached = cache.get(token_cache_key(key))
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+
+        timeout = settings.ACCOUNT_TOKEN_CACHE_TIMEOUT
+        cache.set(token_cache_key(key), (user, token), timeout)
+        cache.set(user_token_cache_key(user.pk), key, timeout)
+
+        return user, token
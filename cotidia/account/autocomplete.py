@@ -0,0 +1,151 @@
+"""
+User autocomplete.
+
+The first name, last name and email of every user are split in normalised
+tokens (lower case, without accents) stored in `UserSearchToken`. A query
+matches the users having a token starting with each of its words, which is an
+indexed prefix lookup instead of a table scan.
+
+The tokens are kept up to date by the `post_save` signal of the user and by
+`UserManager.bulk_create_users`. `account_rebuild_autocomplete` rebuilds them,
+eg after the users were changed with `QuerySet.update()`.
+
+"""
+import re
+import unicodedata
+
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+
+from cotidia.account.models import User, UserSearchToken
+
+TOKEN_FIELDS = ["first_name", "last_name", "email"]
+
+TOKEN_MAX_LENGTH = UserSearchToken._meta.get_field("token").max_length
+
+
+def normalize(value):
+    """Lower case and strip the accents of a string."""
+    value = unicodedata.normalize("NFKD", value or "")
+    return "".join(c for c in value if not unicodedata.combining(c)).lower()
+
+
+def split_words(value):
+    return re.findall(r"\w+", normalize(value))
+
+
+def user_tokens(user):
+    """Return the set of tokens of a user."""
+    tokens = set()
+    for field in TOKEN_FIELDS:
+        tokens.update(split_words(getattr(user, field)))
+    if user.email:
+        # Allow to type an email address in full
+        tokens.add(normalize(user.email).strip())
+    return {token[:TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+def index_user(user):
+    """Update the tokens of a user, only writing the ones that changed."""
+    tokens = user_tokens(user)
+    existing = set(
+        UserSearchToken.objects.filter(user=user).values_list("token", flat=True)
+    )
+    if tokens == existing:
+        return
+
+    with transaction.atomic():
+        UserSearchToken.objects.filter(
+            user=user, token__in=existing - tokens
+        ).delete()
+        UserSearchToken.objects.bulk_create(
+            UserSearchToken(user=user, token=token) for token in tokens - existing
+        )
+
+
+def index_users(users, using="default"):
+    """Replace the tokens of a list of users."""
+    with transaction.atomic(using=using):
+        UserSearchToken.objects.using(using).filter(
+            user_id__in=[user.pk for user in users]
+        ).delete()
+        UserSearchToken.objects.using(using).bulk_create(
+            (
+                UserSearchToken(user_id=user.pk, token=token)
+                for user in users
+                for token in user_tokens(user)
+            ),
+            batch_size=1000,
+        )
+
+
+def autocomplete(queryset, query):
+    """Filter a user queryset to the users matching every word of `query`."""
+    words = [word[:TOKEN_MAX_LENGTH] for word in split_words(query)]
+    if not words:
+        return queryset.none()
+
+    # An email typed in full is a token of its own
+    if "@" in query:
+        words = [normalize(query).strip()[:TOKEN_MAX_LENGTH]]
+
+    for word in set(words):
+        queryset = queryset.filter(
+            pk__in=UserSearchToken.objects.filter(token__startswith=word).values(
+                "user_id"
+            )
+        )
+    return queryset
+
+
+@contextmanager
+def statement_timeout(milliseconds, using="default"):
+    """
+    Cancel the queries running longer than `milliseconds`.
+
+    Only enforced on PostgreSQL, where a cancelled query raises an
+    `OperationalError`. The previous timeout is restored on exit.
+    """
+    connection = connections[using]
+    if not milliseconds or connection.vendor != "postgresql":
+        yield
+        return
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            previous = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true)",
+                [str(int(milliseconds))],
+            )
+        yield
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true)", [previous]
+            )
+
+
+def is_query_cancelled(error):
+    """Whether an error was raised by `statement_timeout`."""
+    return getattr(error.__cause__, "pgcode", None) == "57014"
+
+
+def rebuild(chunk_size=1000, using="default"):
+    """Rebuild the tokens of every user, return the number of users."""
+    count = 0
+    users = (
+        User.objects.using(using).only("pk", *TOKEN_FIELDS).order_by("pk").iterator()
+    )
+    chunk = []
+    for user in users:
+        chunk.append(user)
+        if len(chunk) == chunk_size:
+            index_users(chunk, using)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        index_users(chunk, using)
+        count += len(chunk)
+    return count
@@ -0,0 +1,104 @@
+"""
+Set-based changes to many users at once.
+
+The changes are made with `QuerySet.update()`, `QuerySet.delete()` and
+`bulk_create()` on the m2m through tables, so they run a fixed number of
+queries whatever the number of users. `update()` and `bulk_create()` don't
+send the model signals, so the caches of the changed users are invalidated
+here.
+
+"""
+from django.db import transaction
+
+from cotidia.account.authentication import invalidate_user_tokens
+from cotidia.account.cache import bump_version
+from cotidia.account.conf import settings
+from cotidia.account.models import User, OutboxEmail
+from cotidia.account.notices import UserInvitationNotice
+from cotidia.account.otp import remove_devices
+
+
+def invalidate_users(user_ids):
+    """Invalidate the cached users, tokens and permissions."""
+
+    def invalidate():
+        invalidate_user_tokens(user_ids)
+        for user_id in user_ids:
+            bump_version("user", user_id)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@transaction.atomic
+def activate_users(queryset):
+    """Activate the users, and invite the staff users who have no password."""
+    user_ids = list(
+        queryset.filter(is_active=False).order_by().values_list("pk", flat=True)
+    )
+    User.objects.filter(pk__in=user_ids).update(is_active=True)
+    invalidate_users(user_ids)
+
+    if settings.ACCOUNT_AUTO_SEND_INVITATION_EMAIL:
+        invite_users(User.objects.filter(pk__in=user_ids, is_staff=True))
+    return len(user_ids)
+
+
+@transaction.atomic
+def deactivate_users(queryset):
+    user_ids = list(
+        queryset.filter(is_active=True).order_by().values_list("pk", flat=True)
+    )
+    User.objects.filter(pk__in=user_ids).update(is_active=False)
+    invalidate_users(user_ids)
+    return len(user_ids)
+
+
+def invite_users(queryset, chunk_size=500):
+    """Send the invitation to the active users who have no password yet."""
+    users = queryset.filter(is_active=True, password="").iterator(
+        chunk_size=chunk_size
+    )
+    arguments = [user.get_invitation_notice_kwargs() for user in users]
+    OutboxEmail.objects.send_notices(UserInvitationNotice, arguments)
+    return len(arguments)
+
+
+@transaction.atomic
+def add_users_to_group(queryset, group):
+    Membership = User.groups.through
+    user_ids = list(
+        queryset.exclude(groups=group).order_by().values_list("pk", flat=True)
+    )
+    Membership.objects.bulk_create(
+        [Membership(user_id=user_id, group_id=group.pk) for user_id in user_ids],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    invalidate_users(user_ids)
+    return len(user_ids)
+
+
+@transaction.atomic
+def remove_users_from_group(queryset, group):
+    Membership = User.groups.through
+    memberships = Membership.objects.filter(
+        group_id=group.pk, user_id__in=queryset.order_by().values("pk")
+    )
+    user_ids = list(memberships.values_list("user_id", flat=True))
+    memberships.delete()
+    invalidate_users(user_ids)
+    return len(user_ids)
+
+
+def reset_two_factor(queryset):
+    """Remove the two-factor devices of the users."""
+    return remove_devices(queryset)
+
+
+@transaction.atomic
+def delete_users(queryset):
+    """Delete the users; the deletion signals are sent for each user."""
+    count = queryset.count()
+    queryset.delete()
+    return count
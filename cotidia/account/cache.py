@@ -0,0 +1,66 @@
+"""
+Cache shared by the account caching layers.
+
+When `ACCOUNT_CACHE_BACKEND` names a Django cache alias, the entries are
+stored there so that every node of a deployment sees the same data and the
+same invalidations. Otherwise a bounded in-process LRU cache is used, which is
+private to the current process.
+
+"""
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from cotidia.account.conf import settings
+
+_local_cache = None
+
+
+def get_cache():
+    """Return the cache to use for the account data."""
+    global _local_cache
+
+    if settings.ACCOUNT_CACHE_BACKEND:
+        return caches[settings.ACCOUNT_CACHE_BACKEND]
+
+    if _local_cache is None:
+        _local_cache = LocMemCache(
+            "cotidia-account",
+            {"OPTIONS": {"MAX_ENTRIES": settings.ACCOUNT_CACHE_MAX_ENTRIES}},
+        )
+    return _local_cache
+
+
+def make_key(*parts):
+    """Build a cache key namespaced to the account app."""
+    return ":".join(["account"] + [str(part) for part in parts])
+
+
+def get_version(*parts):
+    """Return the version stamp of a cached resource.
+
+    A missing stamp is initialised from the current time rather than zero, so
+    that a stamp evicted from the cache never goes back to a value used by
+    entries cached before the eviction.
+    """
+    cache = get_cache()
+    key = make_key("version", *parts)
+
+    version = cache.get(key)
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(*parts):
+    """Change the version stamp of a resource, invalidating its entries."""
+    cache = get_cache()
+    key = make_key("version", *parts)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
@@ -21,6 +21,19 @@ class AccountConf(AppConf):
     # Only applies if `ENABLE_TWO_FACTOR` is set to `True`.
     FORCE_ADMIN_TWO_FACTOR = False
 
+    # Path prefixes skipped by the two-factor enforcement of the
+    # `AccountMiddleware` (eg: APIs, health checks). `STATIC_URL` and
+    # `MEDIA_URL` are always skipped.
+    TWO_FACTOR_EXEMPT_PATHS = []
+
+    # Number of backup tokens generated at once.
+    BACKUP_TOKEN_COUNT = 10
+
+    # Failed two-factor token verifications allowed per user and per IP
+    # address within `OTP_ATTEMPT_WINDOW` seconds.
+    OTP_MAX_ATTEMPTS = 10
+    OTP_ATTEMPT_WINDOW = 300
+
     # Define the profile model to use if any
     PROFILE_MODEL = None
 
@@ -28,5 +41,84 @@ class AccountConf(AppConf):
     # is active?
     AUTO_SEND_INVITATION_EMAIL = True
 
+    # Django cache alias used by the account caches (tokens, users, etc).
+    # If `None`, a bounded in-process cache is used instead.
+    CACHE_BACKEND = None
+    # Maximum number of entries kept by the in-process cache.
+    CACHE_MAX_ENTRIES = 10000
+
+    # How long, in seconds, `CachedTokenAuthentication` keeps a token.
+    TOKEN_CACHE_TIMEOUT = 300
+
+    # Cache the session user across requests in `EmailBackend.get_user`.
+    CACHE_USERS = False
+    # How long, in seconds, a user is kept in cache.
+    USER_CACHE_TIMEOUT = 300
+
+    # Cache the permissions of each user across requests in `EmailBackend`.
+    CACHE_PERMISSIONS = False
+    # How long, in seconds, the permissions of a user are kept in cache.
+    PERMISSION_CACHE_TIMEOUT = 300
+
+    # Load the choices of the permission picker from the API in the browser
+    # instead of rendering them in the form.
+    PERMISSION_PICKER_LAZY = False
+
+    # How long the admin menu built for a permission set is kept in cache.
+    MENU_CACHE_TIMEOUT = 3600
+
+    # Hash the password of unknown users too, so that the response time
+    # doesn't reveal which accounts exist.
+    LOGIN_EQUALISE_TIMING = True
+    # Maximum number of password hashes running at once per process. `None`
+    # means no limit.
+    LOGIN_MAX_CONCURRENT_HASHES = None
+    # How long, in seconds, a login waits for a hashing slot before failing.
+    LOGIN_HASH_WAIT = 0.5
+    # Delay, in seconds, suggested to the client before retrying a login that
+    # failed for lack of capacity.
+    LOGIN_RETRY_AFTER = 1
+
+    # Rate limit the sign in, sign up and email sending (reset password,
+    # activation link) views with sliding window counters per IP address, per
+    # email address and for all the clients. A rate is "<requests>/<period>", the
+    # period being one of "s", "m", "h" or "d"; `None` disables a window.
+    ENABLE_THROTTLING = False
+    THROTTLE_RATES = {
+        "sign_in": {"ip": "30/m", "email": "10/m", "global": "600/m"},
+        "sign_up": {"ip": "10/h", "email": None, "global": "100/m"},
+        "email": {"ip": "10/h", "email": "5/h", "global": "200/m"},
+    }
+
+    # Queue the activation, invitation and reset password emails in the
+    # outbox instead of sending them during the request. The outbox is sent by
+    # the `account_send_outbox` management command.
+    EMAIL_OUTBOX = False
+    # Number of attempts before giving up on an email.
+    EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+    # Delay, in seconds, before retrying a failed email.
+    EMAIL_OUTBOX_RETRY_DELAY = 60
+    # Delay, in seconds, after which an email claimed by a worker that never
+    # reported back is claimed again.
+    EMAIL_OUTBOX_CLAIM_TIMEOUT = 600
+
+    # Paginate the admin user lists with cursors instead of page numbers.
+    USER_LIST_CURSOR_PAGINATION = False
+    # Number of users per page of the cursor paginated lists.
+    USER_LIST_PAGE_SIZE = 50
+    # Show the estimated number of users (PostgreSQL only) on the cursor
+    # paginated lists.
+    USER_LIST_APPROXIMATE_COUNT = False
+
+    # Dotted path of the search backend of the admin user lists. If `None`,
+    # the trigram backend is used on PostgreSQL and `icontains` otherwise.
+    USER_SEARCH_BACKEND = None
+
+    # Number of users per page of the autocomplete API.
+    AUTOCOMPLETE_PAGE_SIZE = 10
+    # Time budget, in milliseconds, of an autocomplete query (PostgreSQL only).
+    # `None` means no limit.
+    AUTOCOMPLETE_TIMEOUT = 200
+
     class Meta:
         prefix = "account"
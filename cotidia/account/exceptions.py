@@ -0,0 +1,2 @@
+class LoginCapacityExceeded(Exception):
+    """Too many password hashes are running, the login should be retried."""
@@ -0,0 +1,56 @@
+"""
+Stream users out as CSV or NDJSON.
+
+The rows are read with `values_list(...).iterator()`, which uses a server-side
+cursor where the database supports it, so the memory used stays flat however
+many users are exported.
+
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = (
+    "uuid",
+    "email",
+    "first_name",
+    "last_name",
+    "username",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "date_joined",
+    "last_login",
+)
+
+
+class Echo:
+    """File-like object returning what is written instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset, fields=EXPORT_FIELDS, chunk_size=2000):
+    return (
+        queryset.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)
+    )
+
+
+def export_csv(queryset, fields=EXPORT_FIELDS, chunk_size=2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in iter_rows(queryset, fields, chunk_size):
+        yield writer.writerow(row)
+
+
+def export_ndjson(queryset, fields=EXPORT_FIELDS, chunk_size=2000):
+    for row in iter_rows(queryset, fields, chunk_size):
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (export_csv, "text/csv"),
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+}
@@ -10,8 +10,10 @@ from django.contrib.auth.forms import (
     ReadOnlyPasswordHashField,
 )
 from django.contrib.auth.models import Group, Permission
+from django.utils.translation import ugettext_lazy as _
 
 from cotidia.account.conf import settings
+from cotidia.account.exceptions import LoginCapacityExceeded
 from cotidia.account.models import User
 
 
@@ -56,10 +58,26 @@ def generate_username(email):
 class EmailAuthenticationForm(AuthenticationForm):
     required_css_class = "required"
 
+    error_messages = dict(
+        AuthenticationForm.error_messages,
+        login_unavailable=_(
+            "Too many sign in attempts are in progress. Please try again in a "
+            "moment."
+        ),
+    )
+
     def clean_username(self):
         """Prevent case-sensitive erros in email/username."""
         return self.cleaned_data["username"].lower()
 
+    def clean(self):
+        try:
+            return super().clean()
+        except LoginCapacityExceeded:
+            raise forms.ValidationError(
+                self.error_messages["login_unavailable"], code="login_unavailable"
+            )
+
     def __init__(self, request=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields["username"].widget = forms.TextInput(
@@ -1,23 +1,71 @@
 from django import forms
-from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.models import Group
 
 from betterforms.forms import BetterModelForm
 
+from cotidia.account.models import GroupParent, GroupClosure
+from cotidia.account.forms.fields import PermissionMultipleChoiceField
+
 
 class GroupAddForm(BetterModelForm):
 
-    permissions = forms.ModelMultipleChoiceField(
+    permissions = PermissionMultipleChoiceField()
+    parents = forms.ModelMultipleChoiceField(
+        label="Inherits from",
+        help_text="The role also gets the permissions of these roles.",
         widget=forms.CheckboxSelectMultiple,
-        queryset=Permission.objects.all(),
+        queryset=Group.objects.all(),
         required=False)
 
     class Meta:
         model = Group
-        fields = ['name', 'permissions']
+        fields = ['name', 'permissions', 'parents']
         fieldsets = (
-            ('info', {'fields': ('name', 'permissions'), 'legend': 'Role details'}),
+            (
+                'info',
+                {
+                    'fields': ('name', 'permissions', 'parents'),
+                    'legend': 'Role details'
+                }
+            ),
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['parents'].queryset = Group.objects.exclude(
+                pk=self.instance.pk
+            )
+            self.initial['parents'] = list(
+                self.instance.parent_links.values_list('parent_id', flat=True)
+            )
+
+    def clean_parents(self):
+        parents = self.cleaned_data['parents']
+        if self.instance.pk:
+            for parent in parents:
+                if GroupClosure.objects.would_cycle(parent.pk, self.instance.pk):
+                    raise forms.ValidationError(
+                        "%(role)s already inherits from this role.",
+                        code="cycle",
+                        params={"role": parent},
+                    )
+        return parents
+
+    def _save_m2m(self):
+        super()._save_m2m()
+
+        # Save the links one by one so that the signals update the closure
+        parent_ids = {parent.pk for parent in self.cleaned_data['parents']}
+        existing = {
+            link.parent_id: link for link in self.instance.parent_links.all()
+        }
+        for parent_id, link in existing.items():
+            if parent_id not in parent_ids:
+                link.delete()
+        for parent_id in parent_ids - set(existing):
+            GroupParent.objects.create(parent_id=parent_id, child=self.instance)
+
 
 class GroupUpdateForm(GroupAddForm):
     class Meta:
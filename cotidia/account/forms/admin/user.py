@@ -1,5 +1,7 @@
+import uuid
+
 from django import forms
-from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.models import Group
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.auth.forms import (
     UserCreationForm,
@@ -7,12 +9,12 @@ from django.contrib.auth.forms import (
     ReadOnlyPasswordHashField,
     AdminPasswordChangeForm,
 )
-from django.contrib.auth.models import Group, Permission
 from django.urls import reverse
 
 from betterforms.forms import BetterModelForm, BetterForm
 
 from cotidia.account.models import User
+from cotidia.account.forms.fields import PermissionMultipleChoiceField
 
 
 class UserAddForm(BetterModelForm):
@@ -45,11 +47,7 @@ class SuperUserAddForm(UserAddForm):
         required=False,
     )
 
-    user_permissions = forms.ModelMultipleChoiceField(
-        widget=forms.CheckboxSelectMultiple,
-        queryset=Permission.objects.all(),
-        required=False,
-    )
+    user_permissions = PermissionMultipleChoiceField()
 
     class Meta:
         model = User
@@ -137,11 +135,7 @@ class SuperUserUpdateForm(UserAddForm, UserChangeForm):
         queryset=Group.objects.all(),
         required=False,
     )
-    user_permissions = forms.ModelMultipleChoiceField(
-        widget=forms.CheckboxSelectMultiple,
-        queryset=Permission.objects.all(),
-        required=False,
-    )
+    user_permissions = PermissionMultipleChoiceField()
 
     class Meta:
         model = User
@@ -225,3 +219,68 @@ class ProfileForm(BetterModelForm):
                 },
             ),
         )
+
+
+class MultipleUUIDField(forms.Field):
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return [uuid.UUID(str(item)) for item in value or []]
+        except ValueError:
+            raise forms.ValidationError(_("Enter valid user IDs."), code="invalid")
+
+
+class UserBulkActionForm(forms.Form):
+    ACTION_CHOICES = (
+        ("activate", _("Activate")),
+        ("deactivate", _("Deactivate")),
+        ("invite", _("Send the invitation")),
+        ("add_group", _("Add to the role")),
+        ("remove_group", _("Remove from the role")),
+        ("reset_two_factor", _("Reset the two-factor authentication")),
+        ("delete", _("Delete")),
+    )
+    GROUP_ACTIONS = ("add_group", "remove_group")
+    SUPERUSER_ACTIONS = GROUP_ACTIONS + ("reset_two_factor",)
+    # Actions that need the users selected, or the confirmation to apply them
+    # to the whole list
+    DESTRUCTIVE_ACTIONS = ("deactivate", "reset_two_factor", "delete")
+
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    group = forms.ModelChoiceField(
+        label=_("Role"), queryset=Group.objects.all(), required=False
+    )
+    # Apply to these users only, rather than to the whole list
+    users = MultipleUUIDField(required=False)
+    confirm = forms.BooleanField(
+        label=_("Apply to every user of the list"), required=False
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only superusers can change the roles, as in the user forms, and
+        # disable the two-factor authentication of other users
+        if user is None or not user.is_superuser:
+            self.fields["action"].choices = [
+                choice
+                for choice in self.ACTION_CHOICES
+                if choice[0] not in self.SUPERUSER_ACTIONS
+            ]
+            del self.fields["group"]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get("action")
+        if action in self.GROUP_ACTIONS and not cleaned_data.get("group"):
+            self.add_error("group", _("Please select a role."))
+        if (
+            action in self.DESTRUCTIVE_ACTIONS
+            and not cleaned_data.get("users")
+            and not cleaned_data.get("confirm")
+        ):
+            self.add_error(
+                "confirm",
+                _("Select the users, or confirm applying the action to the list."),
+            )
+        return cleaned_data
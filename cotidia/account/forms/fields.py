@@ -0,0 +1,37 @@
+from django import forms
+from django.contrib.auth.models import Permission
+
+from cotidia.account.permissions import get_permission_groups
+from cotidia.account.widgets import PermissionSelectMultiple
+
+
+class PermissionChoiceIterator:
+    """Read the cached permission groups only when the choices are used."""
+
+    def __iter__(self):
+        return iter(get_permission_groups())
+
+
+class PermissionMultipleChoiceField(forms.ModelMultipleChoiceField):
+    """
+    Pick permissions, grouped by app and model.
+
+    The choices come from the cached permission list rather than from a query
+    on every render. The submitted values are still validated against the
+    database.
+    """
+
+    widget = PermissionSelectMultiple
+
+    def __init__(self, queryset=None, **kwargs):
+        if queryset is None:
+            queryset = Permission.objects.all()
+        kwargs.setdefault("required", False)
+        super().__init__(queryset, **kwargs)
+
+    def _get_choices(self):
+        if hasattr(self, "_choices"):
+            return self._choices
+        return PermissionChoiceIterator()
+
+    choices = property(_get_choices, forms.ChoiceField._set_choices)
@@ -12,8 +12,35 @@ from two_factor.forms import (
 from two_factor.utils import totp_digits
 from two_factor.validators import validate_international_phonenumber
 
+from cotidia.account import otp
+from cotidia.account.throttling import get_client_ip
 
-class AuthenticationTokenForm(BaseAuthenticationTokenForm):
+
+class OTPGuardMixin:
+    """
+    Reject the replayed tokens and the users or IP addresses with too many
+    failed attempts before verifying a token against the devices.
+
+    `clean()` guards the `otp_token` of the login forms; other forms call
+    `guard()` around their own verification.
+    """
+
+    def __init__(self, *args, request=None, **kwargs):
+        self.request = request
+        super().__init__(*args, **kwargs)
+
+    def guard(self, user, token, verify):
+        """Run `verify()` for a token of `user`, recording the outcome."""
+        return otp.guard_token(user.pk, token, verify, get_client_ip(self.request))
+
+    def clean(self):
+        token = self.cleaned_data.get("otp_token")
+        if token in (None, ""):
+            return super().clean()
+        return self.guard(self.user, token, super().clean)
+
+
+class AuthenticationTokenForm(OTPGuardMixin, BaseAuthenticationTokenForm):
     otp_token = forms.IntegerField(
         label="Token",
         min_value=1,
@@ -25,7 +52,7 @@ class AuthenticationTokenForm(BaseAuthenticationTokenForm):
     )
 
 
-class BackupTokenForm(BaseBackupTokenForm):
+class BackupTokenForm(OTPGuardMixin, BaseBackupTokenForm):
     otp_token = forms.CharField(
         label="Token",
         widget=forms.TextInput(
@@ -87,7 +114,7 @@ class PhoneNumberForm(BasePhoneNumberForm):
     )
 
 
-class DeviceValidationForm(BaseDeviceValidationForm):
+class DeviceValidationForm(OTPGuardMixin, BaseDeviceValidationForm):
     token = forms.IntegerField(
         label="Token",
         min_value=1,
@@ -98,6 +125,14 @@ class DeviceValidationForm(BaseDeviceValidationForm):
         required=False,
     )
 
+    def clean_token(self):
+        token = self.cleaned_data.get("token")
+        if token in (None, ""):
+            return super().clean_token()
+        # The device of a setup isn't saved yet, and may not have its user
+        user = getattr(self.request, "user", None) or self.device.user
+        return self.guard(user, token, super().clean_token)
+
 
 class YubiKeyDeviceForm(DeviceValidationForm):
     token = forms.CharField(
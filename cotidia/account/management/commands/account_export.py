@@ -0,0 +1,66 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from cotidia.account.export import EXPORT_FORMATS
+from cotidia.account.models import User
+from cotidia.account.search import search_users
+
+
+class Command(BaseCommand):
+    help = "Export users as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(EXPORT_FORMATS),
+            default="csv",
+            help="Output format.",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write the export to, stdout by default.",
+        )
+        parser.add_argument(
+            "--search",
+            help="Only export the users matching the admin list search.",
+        )
+        parser.add_argument(
+            "--role",
+            choices=["normal", "staff", "superuser"],
+            help="Only export the users of a given role.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of rows fetched from the database at once.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = User.objects.all()
+
+        if options["role"] == "normal":
+            queryset = queryset.filter(is_staff=False, is_superuser=False)
+        elif options["role"] == "staff":
+            queryset = queryset.filter(is_staff=True, is_superuser=False)
+        elif options["role"] == "superuser":
+            queryset = queryset.filter(is_superuser=True)
+
+        if options["search"]:
+            # Same search as the admin user lists
+            queryset = search_users(queryset, options["search"])
+
+        exporter, content_type = EXPORT_FORMATS[options["format"]]
+
+        if options["output"]:
+            output = open(options["output"], "w", newline="", encoding="utf-8")
+        else:
+            output = sys.stdout
+
+        try:
+            for line in exporter(queryset, chunk_size=options["chunk_size"]):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
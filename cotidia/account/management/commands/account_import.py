@@ -0,0 +1,122 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cotidia.account.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV or NDJSON file. Expected columns: email, "
+        "password, first_name, last_name, username, is_active, is_staff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, `-` for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of users inserted at once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of processes hashing the passwords.",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="File to write the rejected rows to, as NDJSON.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"]
+        if input_format is None:
+            if path.endswith(".csv"):
+                input_format = "csv"
+            elif path.endswith(".ndjson") or path.endswith(".jsonl"):
+                input_format = "ndjson"
+            else:
+                raise CommandError("Please specify the input --format.")
+
+        if path == "-":
+            source = sys.stdin
+        else:
+            source = open(path, newline="", encoding="utf-8")
+
+        rejects = open(options["rejects"], "w") if options["rejects"] else None
+
+        self.rejected = 0
+        self.processed = 0
+        self.start = time.perf_counter()
+
+        def on_reject(row, reason):
+            self.rejected += 1
+            if rejects:
+                rejects.write(json.dumps({"row": row, "reason": reason}) + "\n")
+            else:
+                self.stderr.write("Rejected {}: {}".format(row.get("email"), reason))
+
+        def on_chunk(count):
+            self.created += count
+            elapsed = time.perf_counter() - self.start
+            self.stdout.write(
+                "{} rows processed, {} users created, {} rejected "
+                "({:.0f} rows/s)".format(
+                    self.processed,
+                    self.created,
+                    self.rejected,
+                    self.processed / elapsed,
+                )
+            )
+
+        def read_rows():
+            if input_format == "csv":
+                for row in csv.DictReader(source):
+                    self.processed += 1
+                    yield row
+                return
+
+            for line in source:
+                if not line.strip():
+                    continue
+                self.processed += 1
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    on_reject({"line": line.strip()}, "Invalid JSON.")
+
+        self.created = 0
+        try:
+            User.objects.bulk_create_users(
+                read_rows(),
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                on_reject=on_reject,
+                on_chunk=on_chunk,
+            )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if rejects:
+                rejects.close()
+
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(
+            "Imported {} users in {:.1f}s ({:.0f} rows/s), {} rows rejected.".format(
+                self.created,
+                elapsed,
+                self.processed / elapsed if elapsed else 0,
+                self.rejected,
+            )
+        )
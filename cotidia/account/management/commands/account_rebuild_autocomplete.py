@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from cotidia.account.autocomplete import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the autocomplete tokens of every user."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of users indexed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write("{} user(s) indexed.".format(count))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Lower
+
+from cotidia.account.models import User
+from cotidia.account.otp import remove_devices
+
+
+class Command(BaseCommand):
+    help = "Remove the two-factor authentication devices of the given users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("emails", nargs="+", help="Email of the users.")
+
+    def handle(self, *args, **options):
+        # The emails of the users may not be lower case
+        emails = {email.strip().lower() for email in options["emails"]}
+        users = User.objects.annotate(email_lower=Lower("email")).filter(
+            email_lower__in=emails
+        )
+        missing = emails - set(users.values_list("email_lower", flat=True))
+        if missing:
+            raise CommandError("Unknown user(s): {}".format(", ".join(sorted(missing))))
+
+        count = remove_devices(users)
+        self.stdout.write("{} user(s) reset.".format(count))
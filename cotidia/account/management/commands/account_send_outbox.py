@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cotidia.account.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = "Send the emails queued in the account outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of emails claimed at once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of threads sending the emails.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting once it is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between two polls when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = process_batch(
+                batch_size=options["batch_size"], workers=options["workers"]
+            )
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            "{} email(s) sent, {} failed.".format(total_sent, total_failed)
+        )
@@ -1,8 +1,77 @@
+import hashlib
+import itertools
+import json
+import uuid
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Lower
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import BaseUserManager
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from cotidia.account.conf import settings
+
+
+def hash_password(password):
+    """Hash a password, run in the worker processes of `bulk_create_users`."""
+    return make_password(password)
+
+
+def init_hash_worker():
+    """Make sure Django is set up in a spawned worker process."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def split_perm(perm):
+    """Split a `app_label.codename` permission name."""
+    app_label, codename = perm.split(".", 1)
+    return app_label, codename
+
+
+class UserQuerySet(models.QuerySet):
+
+    def visible_to(self, user, perm="account.change_user"):
+        """
+        Filter the users `user` may manage with the permission `perm`.
+
+        Superusers manage everyone. Staff users with the model permission
+        manage the users that are neither staff nor superuser. Anyone manages
+        the users they were granted `perm` on with an `ObjectPermission`,
+        directly or through one of their groups.
+
+        """
+        from cotidia.account.models import ObjectPermission
+
+        if not user.is_active or user.is_anonymous:
+            return self.none()
+        if user.is_superuser:
+            return self.all()
+
+        condition = models.Q(
+            pk__in=ObjectPermission.objects.for_user(user, perm, self.model).values(
+                "object_id"
+            )
+        )
+        if user.is_staff and user.has_perm(perm):
+            condition |= models.Q(is_staff=False, is_superuser=False)
+        return self.filter(condition)
 
 
 class UserManager(BaseUserManager):
 
+    def get_queryset(self):
+        return UserQuerySet(self.model, using=self._db)
+
+    def visible_to(self, user, perm="account.change_user"):
+        return self.get_queryset().visible_to(user, perm)
+
     def create_user(
             self,
             email=None,
@@ -40,6 +109,338 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def bulk_create_users(
+            self,
+            rows,
+            chunk_size=1000,
+            workers=None,
+            on_reject=None,
+            on_chunk=None):
+        """
+        Create users in bulk from an iterable of dicts.
+
+        Each row must have an `email` and may have a `password`, `first_name`,
+        `last_name`, `username`, `is_active` and `is_staff`. The rows are
+        consumed in chunks: the passwords of a chunk are hashed in a pool of
+        `workers` processes, then the users, their API tokens and autocomplete
+        tokens are inserted with one `bulk_create` each. `post_save` is not sent.
+
+        Invalid rows are passed to `on_reject(row, reason)` and skipped, the
+        number of users created by each chunk is passed to `on_chunk(count)`.
+        Return the total number of users created.
+
+        """
+        from rest_framework.authtoken.models import Token
+        from cotidia.account.autocomplete import index_users
+
+        rows = iter(rows)
+        created = 0
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_hash_worker
+        ) as executor:
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+
+                users = self.build_users(chunk, on_reject)
+                passwords = [user.password for user in users]
+                hashed = executor.map(
+                    hash_password,
+                    passwords,
+                    chunksize=max(len(passwords) // ((workers or 4) * 4), 1),
+                )
+                for user, password in zip(users, hashed):
+                    user.password = password
+
+                try:
+                    with transaction.atomic(using=self._db):
+                        self.bulk_create(users)
+                        if users and users[0].pk is None:
+                            # Not all databases return the primary keys
+                            pks = dict(
+                                self.annotate(email_lower=Lower("email"))
+                                .filter(email_lower__in=[user.email for user in users])
+                                .values_list("email_lower", "pk")
+                            )
+                            for user in users:
+                                user.pk = pks[user.email]
+                        Token.objects.using(self._db).bulk_create(
+                            Token(key=Token().generate_key(), user_id=user.pk)
+                            for user in users
+                        )
+                        index_users(users, self._db)
+                except IntegrityError as e:
+                    # Most likely a concurrent insert of the same users
+                    for user in users:
+                        if on_reject:
+                            on_reject(user.row, str(e))
+                    users = []
+
+                created += len(users)
+                if on_chunk:
+                    on_chunk(len(users))
+
+        return created
+
+    def build_users(self, rows, on_reject=None):
+        """Validate a chunk of rows and return the unsaved users."""
+
+        def reject(row, reason):
+            if on_reject:
+                on_reject(row, reason)
+
+        valid = []
+        emails = set()
+        for row in rows:
+            email = self.normalize_email((row.get("email") or "").strip()).lower()
+            try:
+                validate_email(email)
+            except ValidationError:
+                reject(row, "Invalid email address.")
+                continue
+            if email in emails:
+                reject(row, "Duplicate email address.")
+                continue
+            emails.add(email)
+            valid.append((email, row))
+
+        # The emails of the existing users may not be lower case
+        existing = set(
+            self.annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=emails)
+            .values_list("email_lower", flat=True)
+        )
+
+        users = []
+        usernames = {}
+        for email, row in valid:
+            if email in existing:
+                reject(row, "A user with that email already exists.")
+                continue
+            username = (
+                row.get("username")
+                or hashlib.md5(email.encode("utf-8")).hexdigest()[0:30]
+            )
+            if username in usernames:
+                reject(row, "Duplicate username.")
+                continue
+            user = self.model(
+                email=email,
+                username=username,
+                first_name=(row.get("first_name") or "").strip(),
+                last_name=(row.get("last_name") or "").strip(),
+                is_active=parse_bool(row.get("is_active"), True),
+                is_staff=parse_bool(row.get("is_staff"), False),
+                # Replaced by the hash, or an unusable password if empty
+                password=row.get("password") or None,
+            )
+            user.row = row
+            usernames[username] = user
+            users.append(user)
+
+        existing = set(
+            self.filter(username__in=usernames).values_list("username", flat=True)
+        )
+        for username in existing:
+            reject(
+                usernames[username].row, "A user with that username already exists."
+            )
+
+        return [user for user in users if user.username not in existing]
+
+    def get_by_uuid(self, value):
+        """Return the user for a given uuid, using the unique uuid index.
+
+        Raise `DoesNotExist` if the value is not a valid uuid, so callers only
+        have a single exception to handle.
+        """
+        try:
+            value = uuid.UUID(str(value))
+        except ValueError:
+            raise self.model.DoesNotExist(
+                "%s matching query does not exist." % self.model._meta.object_name
+            )
+        return self.get(uuid=value)
+
     def create_username(self, first_name, last_name):
         """Generate a username from the first and last name."""
         return (first_name+last_name).lower().replace(' ', '')
+
+
+def parse_bool(value, default):
+    """Read a boolean from an import row."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ["1", "true", "yes", "y"]
+
+
+class OutboxEmailManager(models.Manager):
+
+    def send_notice(self, notice_class, **kwargs):
+        """Send a notice, or queue it in the outbox if enabled.
+
+        The outbox entry is saved in the current transaction, so the email is
+        only sent if the transaction commits.
+        """
+        if settings.ACCOUNT_EMAIL_OUTBOX:
+            return self.enqueue(notice_class, **kwargs)
+
+        notice = notice_class(**kwargs)
+        notice.send(force_now=True)
+
+    def send_notices(self, notice_class, arguments):
+        """Send a notice for each dict of `arguments`.
+
+        With the outbox enabled, the notices are queued with a single
+        `bulk_create` instead of being sent one by one.
+        """
+        if settings.ACCOUNT_EMAIL_OUTBOX:
+            return self.enqueue_many(notice_class, arguments)
+
+        for kwargs in arguments:
+            notice_class(**kwargs).send(force_now=True)
+
+    def enqueue_many(self, notice_class, arguments, batch_size=500):
+        return self.bulk_create(
+            (
+                self.model(**self.entry_values(notice_class, **kwargs))
+                for kwargs in arguments
+            ),
+            batch_size=batch_size,
+        )
+
+    def enqueue(self, notice_class, **kwargs):
+        """Queue a notice to be sent by the `account_send_outbox` command."""
+        return self.create(**self.entry_values(notice_class, **kwargs))
+
+    def entry_values(self, notice_class, **kwargs):
+        return {
+            "notice": "{}.{}".format(notice_class.__module__, notice_class.__name__),
+            "arguments": json.dumps(kwargs),
+        }
+
+
+class ObjectPermissionManager(models.Manager):
+
+    def get_permission(self, perm):
+        from django.contrib.auth.models import Permission
+
+        app_label, codename = split_perm(perm)
+        return Permission.objects.get(
+            content_type__app_label=app_label, codename=codename
+        )
+
+    def grant(self, perm, obj, user=None, group=None):
+        """Grant `perm` on `obj` to a user or a group."""
+        from django.contrib.contenttypes.models import ContentType
+
+        grant, created = self.get_or_create(
+            user=user,
+            group=group,
+            permission=self.get_permission(perm),
+            content_type=ContentType.objects.get_for_model(obj),
+            object_id=obj.pk,
+        )
+        return grant
+
+    def revoke(self, perm, obj, user=None, group=None):
+        from django.contrib.contenttypes.models import ContentType
+
+        self.filter(
+            user=user,
+            group=group,
+            permission=self.get_permission(perm),
+            content_type=ContentType.objects.get_for_model(obj),
+            object_id=obj.pk,
+        ).delete()
+
+    def for_user(self, user, perm, model):
+        """Return the grants of `perm` on a model to a user or their groups."""
+        from django.contrib.contenttypes.models import ContentType
+
+        app_label, codename = split_perm(perm)
+        return self.filter(
+            models.Q(user=user) | models.Q(group__user=user),
+            content_type=ContentType.objects.get_for_model(model),
+            permission__content_type__app_label=app_label,
+            permission__codename=codename,
+        )
+
+
+class GroupClosureManager(models.Manager):
+    """
+    Maintain the transitive closure of the group hierarchy.
+
+    Every group has a row pointing to itself, and a row for each of its
+    ancestors with the number of distinct paths leading to it. Adding or
+    removing an edge updates the counts of the pairs going through it, so the
+    table is kept up to date without walking the whole hierarchy.
+
+    """
+
+    def ancestors(self, group_id):
+        return list(
+            self.filter(descendant_id=group_id).values_list("ancestor_id", "paths")
+        )
+
+    def descendants(self, group_id):
+        return list(
+            self.filter(ancestor_id=group_id).values_list("descendant_id", "paths")
+        )
+
+    def add_group(self, group_id):
+        self.get_or_create(ancestor_id=group_id, descendant_id=group_id, paths=1)
+
+    def would_cycle(self, parent_id, child_id):
+        """Whether making `parent_id` a parent of `child_id` creates a cycle."""
+        return self.filter(ancestor_id=child_id, descendant_id=parent_id).exists()
+
+    def add_edge(self, parent_id, child_id):
+        self._update_paths(parent_id, child_id, 1)
+
+    def remove_edge(self, parent_id, child_id):
+        self._update_paths(parent_id, child_id, -1)
+
+    def _update_paths(self, parent_id, child_id, sign):
+        with transaction.atomic(using=self.db):
+            deltas = {
+                (ancestor_id, descendant_id): sign * up * down
+                for ancestor_id, up in self.ancestors(parent_id)
+                for descendant_id, down in self.descendants(child_id)
+            }
+            if not deltas:
+                return
+
+            ancestor_ids = {ancestor_id for ancestor_id, _ in deltas}
+            descendant_ids = {descendant_id for _, descendant_id in deltas}
+            rows = {
+                (row.ancestor_id, row.descendant_id): row
+                for row in self.select_for_update().filter(
+                    ancestor_id__in=ancestor_ids, descendant_id__in=descendant_ids
+                )
+            }
+
+            created, updated, deleted = [], [], []
+            for pair, delta in deltas.items():
+                row = rows.get(pair)
+                if row is None:
+                    if delta > 0:
+                        created.append(
+                            self.model(
+                                ancestor_id=pair[0], descendant_id=pair[1], paths=delta
+                            )
+                        )
+                    continue
+                row.paths += delta
+                if row.paths > 0:
+                    updated.append(row)
+                else:
+                    deleted.append(row.pk)
+
+            self.bulk_create(created)
+            self.bulk_update(updated, ["paths"])
+            self.filter(pk__in=deleted).delete()
@@ -1,30 +1,84 @@
-from django.urls import reverse
+import hashlib
+
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+from cotidia.account.cache import get_cache, make_key
+from cotidia.account.conf import settings
+
+MENU = [
+    {
+        "icon": "wrench",
+        "text": "Account management",
+        "description": "Manage users and roles.",
+        "align_right": True,
+        "nav_items": [
+            {
+                "text": "Users",
+                "icon": "users",
+                "url": "account-admin:user-list",
+                "permissions": ["account.add_user", "account.change_user"],
+            },
+            {
+                "text": "Roles",
+                "icon": "key",
+                "url": "account-admin:group-list",
+                "permissions": ["perms.auth.add_group", "perms.auth.change_group"],
+            },
+        ],
+    }
+]
+
+
+def get_permission_profile(user):
+    """Return a hash of the permission set of a user."""
+    if user.is_active and user.is_superuser:
+        return "superuser"
+    perms = sorted(user.get_all_permissions()) if user.is_active else []
+    return hashlib.sha1("\n".join(perms).encode()).hexdigest()
+
+
+def has_any_permission(perms, item):
+    if perms is None:
+        return True
+    for perm in item["permissions"]:
+        if perm.startswith("perms."):
+            perm = perm[len("perms.") :]
+        if perm in perms:
+            return True
+    return False
+
+
+def build_menu(user):
+    """Resolve the menu URLs, keeping the items the user has access to."""
+    if user.is_active and user.is_superuser:
+        perms = None
+    else:
+        perms = user.get_all_permissions() if user.is_active else set()
+
+    menu = []
+    for section in MENU:
+        nav_items = [
+            dict(item, url=reverse(item["url"]))
+            for item in section["nav_items"]
+            if has_any_permission(perms, item)
+        ]
+        if nav_items:
+            menu.append(dict(section, nav_items=nav_items))
+    return menu
 
 
 def admin_menu(context):
-    request = context["request"]
-    return [
-        {
-            "icon": "wrench",
-            "text": "Account management",
-            "description": "Manage users and roles.",
-            "align_right": True,
-            "nav_items": [
-                {
-                    "text": "Users",
-                    "icon": "users",
-                    "url": reverse("account-admin:user-list"),
-                    "permissions": ["account.add_user", "account.change_user"],
-                },
-                {
-                    "text": "Roles",
-                    "icon": "key",
-                    "url": reverse("account-admin:group-list"),
-                    "permissions": [
-                        "perms.auth.add_group",
-                        "perms.auth.change_group"
-                    ],
-                }
-            ]
-        }
-    ]
+    """Return the menu, built once per URLconf and permission set."""
+    user = context["request"].user
+    key = make_key(
+        "menu",
+        get_urlconf() or settings.ROOT_URLCONF,
+        get_script_prefix(),
+        get_permission_profile(user),
+    )
+    cache = get_cache()
+    menu = cache.get(key)
+    if menu is None:
+        menu = build_menu(user)
+        cache.set(key, menu, settings.ACCOUNT_MENU_CACHE_TIMEOUT)
+    return menu
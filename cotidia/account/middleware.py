@@ -1,32 +1,103 @@
+import functools
+
 from django.http import HttpResponseRedirect
-from django.urls import reverse
+from django.urls import get_urlconf, reverse
 from django.contrib import messages
+from django.contrib.auth import SESSION_KEY
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from django_otp.middleware import OTPMiddleware as BaseOTPMiddleware, is_verified
+from django_otp.models import Device
 
 from cotidia.account.conf import settings
+from cotidia.account.otp import (
+    DEVICE_ID_SESSION_KEY,
+    is_session_verified,
+    remember_verified,
+)
+
+
+__all__ = ['AccountMiddleware', 'OTPMiddleware']
 
 
-__all__ = ['AccountMiddleware']
+class OTPMiddleware(BaseOTPMiddleware):
+    """
+    Same as `django_otp.middleware.OTPMiddleware`, but the device of a session
+    already found verified is only loaded when it is used.
+    """
+
+    def _verify_user(self, request, user):
+        if user.is_authenticated and is_session_verified(request.session, user.pk):
+            device_id = request.session[DEVICE_ID_SESSION_KEY]
+            user.otp_device = SimpleLazyObject(
+                functools.partial(Device.from_persistent_id, device_id)
+            )
+            user.is_verified = functools.partial(is_verified, user)
+            return user
+
+        user = super()._verify_user(request, user)
+        if user.otp_device is not None:
+            remember_verified(request.session, user.pk)
+        return user
 
 
 class AccountMiddleware(MiddlewareMixin):
 
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self._exempt_urls = {}
+
+    def get_exempt_urls(self, request):
+        """Return the URLs reachable before the two-factor setup."""
+        urlconf = getattr(request, 'urlconf', None) or get_urlconf()
+        if urlconf not in self._exempt_urls:
+            self._exempt_urls[urlconf] = frozenset(
+                reverse(name, urlconf=urlconf) for name in [
+                    'account-admin:setup',
+                    'account-admin:logout',
+                    'account-admin:qr',
+                ]
+            )
+        return self._exempt_urls[urlconf]
+
+    def get_exempt_prefixes(self):
+        prefixes = list(settings.ACCOUNT_TWO_FACTOR_EXEMPT_PATHS)
+        for url in [settings.STATIC_URL, settings.MEDIA_URL]:
+            if url and url.startswith('/'):
+                prefixes.append(url)
+        return tuple(prefixes)
+
+    def is_verified(self, request):
+        if request.user.is_verified():
+            remember_verified(request.session, request.user.pk)
+            return True
+        return False
+
     def process_request(self, request):
 
-        if settings.ACCOUNT_ENABLE_TWO_FACTOR is True:
+        if settings.ACCOUNT_ENABLE_TWO_FACTOR is True \
+                and settings.ACCOUNT_FORCE_ADMIN_TWO_FACTOR is True:
+
+            # Static files, health checks, APIs...
+            if request.path.startswith(self.get_exempt_prefixes()):
+                return None
+
+            # Anonymous sessions don't have a user to load
+            if SESSION_KEY not in request.session:
+                return None
+
+            if is_session_verified(request.session):
+                return None
 
             # If the account had two factor enabled and forces admin to
             # setup the two-factor auth we then check if:
             # - They are authenticated (first step)
             # - They are not verified (second step)
-            if settings.ACCOUNT_FORCE_ADMIN_TWO_FACTOR is True \
-                    and request.user.is_authenticated \
-                    and not request.user.is_verified():
-
-                setup_url = reverse('account-admin:setup')
-                logout_url = reverse('account-admin:logout')
-                qrcode_url = reverse('account-admin:qr')
-                if request.path not in [setup_url, logout_url, qrcode_url]:
+            if request.user.is_authenticated \
+                    and not self.is_verified(request):
+
+                if request.path not in self.get_exempt_urls(request):
                     messages.warning(
                         request,
                         "You must setup two-factor authentication to access "
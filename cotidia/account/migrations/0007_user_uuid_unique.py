@@ -0,0 +1,35 @@
+import uuid
+
+from django.db import migrations, models
+
+from cotidia.account.operations import CreateIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # See `CreateIndexConcurrently`
+    atomic = False
+
+    dependencies = [
+        ('account', '0006_auto_20180109_1656'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='user',
+                    name='uuid',
+                    field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+            ],
+            database_operations=[
+                CreateIndexConcurrently(
+                    model_name='user',
+                    name='account_user_uuid_uniq',
+                    expressions=['uuid'],
+                    unique=True,
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from cotidia.account.operations import CreateIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # See `CreateIndexConcurrently`
+    atomic = False
+
+    dependencies = [
+        ('account', '0007_user_uuid_unique'),
+    ]
+
+    operations = [
+        # Case-insensitive email lookups made by `EmailBackend.authenticate`.
+        CreateIndexConcurrently(
+            model_name='user',
+            name='account_user_email_lower',
+            expressions=['LOWER(email)'],
+            vendors=['postgresql', 'sqlite'],
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+from cotidia.account.operations import CreateIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # See `CreateIndexConcurrently`
+    atomic = False
+
+    dependencies = [
+        ('account', '0009_outboxemail'),
+    ]
+
+    operations = [
+        # Ordering and cursor pagination of the admin user lists.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='user',
+                    index=models.Index(
+                        fields=['first_name', 'last_name', 'id'],
+                        name='account_user_name_idx',
+                    ),
+                ),
+            ],
+            database_operations=[
+                CreateIndexConcurrently(
+                    model_name='user',
+                    name='account_user_name_idx',
+                    expressions=['first_name', 'last_name', 'id'],
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,92 @@
+from django.db import DatabaseError, migrations
+
+from cotidia.account.operations import CreateIndexConcurrently
+
+FTS_INSTALL_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS account_user_search USING fts5("
+    "first_name, last_name, email, content='account_user', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS account_user_search_insert "
+    "AFTER INSERT ON account_user BEGIN "
+    "INSERT INTO account_user_search(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS account_user_search_delete "
+    "AFTER DELETE ON account_user BEGIN "
+    "INSERT INTO account_user_search"
+    "(account_user_search, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS account_user_search_update "
+    "AFTER UPDATE ON account_user BEGIN "
+    "INSERT INTO account_user_search"
+    "(account_user_search, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    "INSERT INTO account_user_search(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "INSERT INTO account_user_search(account_user_search) VALUES ('rebuild')",
+]
+
+FTS_UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS account_user_search_insert",
+    "DROP TRIGGER IF EXISTS account_user_search_delete",
+    "DROP TRIGGER IF EXISTS account_user_search_update",
+    "DROP TABLE IF EXISTS account_user_search",
+]
+
+
+def create_trigram_extension(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+def has_fts5(connection):
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE temp.account_fts5_check USING fts5(value)"
+            )
+        except DatabaseError:
+            return False
+        cursor.execute("DROP TABLE temp.account_fts5_check")
+    return True
+
+
+def create_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or not has_fts5(connection):
+        return
+    with connection.cursor() as cursor:
+        for statement in FTS_INSTALL_SQL:
+            cursor.execute(statement)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in FTS_UNINSTALL_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    # See `CreateIndexConcurrently`
+    atomic = False
+
+    dependencies = [
+        ('account', '0010_user_name_index'),
+    ]
+
+    operations = [
+        # Used by `cotidia.account.search.TrigramSearch`.
+        migrations.RunPython(create_trigram_extension, migrations.RunPython.noop),
+        CreateIndexConcurrently(
+            model_name='user',
+            name='account_user_search_trgm',
+            expressions=[
+                "LOWER(first_name || ' ' || last_name || ' ' || email) gin_trgm_ops"
+            ],
+            using='gin',
+            vendors=['postgresql'],
+        ),
+        # Used by `cotidia.account.search.SQLiteFTSSearch`.
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
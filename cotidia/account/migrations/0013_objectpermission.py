@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('account', '0012_usersearchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObjectPermission',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='object_permissions', to='auth.Group')),
+                ('permission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.Permission')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='object_permissions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Object permission',
+                'verbose_name_plural': 'Object permissions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='objectpermission',
+            index=models.Index(fields=['user', 'content_type', 'permission', 'object_id'], name='account_objperm_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='objectpermission',
+            index=models.Index(fields=['group', 'content_type', 'permission', 'object_id'], name='account_objperm_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='objectpermission',
+            index=models.Index(fields=['content_type', 'object_id'], name='account_objperm_obj_idx'),
+        ),
+    ]
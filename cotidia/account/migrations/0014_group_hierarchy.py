@@ -0,0 +1,55 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_closure_rows(apps, schema_editor):
+    """Every existing group is its own ancestor."""
+    Group = apps.get_model('auth', 'Group')
+    GroupClosure = apps.get_model('account', 'GroupClosure')
+    db_alias = schema_editor.connection.alias
+    GroupClosure.objects.using(db_alias).bulk_create(
+        (
+            GroupClosure(ancestor_id=pk, descendant_id=pk, paths=1)
+            for pk in Group.objects.using(db_alias).values_list('pk', flat=True)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('account', '0013_objectpermission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupClosure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paths', models.PositiveIntegerField(default=1)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='auth.Group')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='auth.Group')),
+            ],
+            options={
+                'verbose_name': 'Group closure',
+                'verbose_name_plural': 'Group closures',
+                'unique_together': {('descendant', 'ancestor')},
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupParent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('child', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parent_links', to='auth.Group')),
+                ('parent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='child_links', to='auth.Group')),
+            ],
+            options={
+                'verbose_name': 'Group parent',
+                'verbose_name_plural': 'Group parents',
+                'unique_together': {('parent', 'child')},
+            },
+        ),
+        migrations.RunPython(create_closure_rows, migrations.RunPython.noop),
+    ]
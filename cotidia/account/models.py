@@ -10,15 +10,20 @@ from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
 from rest_framework.authtoken.models import Token
-from two_factor.utils import default_device
 
 from cotidia.account.conf import settings
 from cotidia.account.notices import NewUserActivationNotice, UserInvitationNotice
-from cotidia.account.managers import UserManager
+from cotidia.account.otp import get_default_device_id
+from cotidia.account.managers import (
+    UserManager,
+    OutboxEmailManager,
+    ObjectPermissionManager,
+    GroupClosureManager,
+)
 
 
 class User(AbstractUser):
-    uuid = models.UUIDField(default=uuid.uuid4, editable=False)
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     email = models.EmailField(
         _("email address"),
         blank=True,
@@ -33,9 +38,29 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ["first_name", "last_name"]
+        indexes = [
+            models.Index(
+                fields=["first_name", "last_name", "id"], name="account_user_name_idx"
+            )
+        ]
         verbose_name = "User"
         verbose_name_plural = "Users"
 
+    def is_visible_to(self, user, perm="account.change_user"):
+        """Whether `user` may manage this user, see `UserQuerySet.visible_to`."""
+        if not user.is_active or user.is_anonymous:
+            return False
+        if user.is_superuser:
+            return True
+        if (
+            not self.is_staff
+            and not self.is_superuser
+            and user.is_staff
+            and user.has_perm(perm)
+        ):
+            return True
+        return user.has_perm(perm, self)
+
     def __str__(self):
         if self.first_name or self.last_name:
             return "%s %s" % (self.first_name, self.last_name)
@@ -60,7 +85,7 @@ class User(AbstractUser):
     @property
     def two_factor_auth_enabled(self):
         if self.is_staff or self.is_superuser:
-            return default_device(self)
+            return get_default_device_id(self) is not None
         return False
 
     def get_absolute_url(self):
@@ -83,14 +108,20 @@ class User(AbstractUser):
                 ),
             )
 
-        notice = NewUserActivationNotice(
+        OutboxEmail.objects.send_notice(
+            NewUserActivationNotice,
             sender=settings.DEFAULT_FROM_EMAIL,
             recipients=["{0} <{1}>".format(self.get_full_name(), self.email)],
             context={"url": url, "first_name": self.first_name},
         )
-        notice.send(force_now=True)
 
     def send_invitation_email(self):
+        OutboxEmail.objects.send_notice(
+            UserInvitationNotice, **self.get_invitation_notice_kwargs()
+        )
+
+    def get_invitation_notice_kwargs(self):
+        """Return the arguments of the invitation notice of the user."""
 
         if self.is_staff or self.is_superuser:
             uid = urlsafe_base64_encode(force_bytes(self.pk)).decode()
@@ -114,13 +145,160 @@ class User(AbstractUser):
                 )
 
         context = {"url": url, "first_name": self.first_name}
-        notice = UserInvitationNotice(
+        return dict(
             subject="Welcome to {}".format(settings.SITE_NAME),
             sender=settings.DEFAULT_FROM_EMAIL,
             recipients=["{0} <{1}>".format(self.get_full_name(), self.email)],
             context=context,
         )
-        notice.send(force_now=True)
+
+
+class OutboxEmail(models.Model):
+    """An email notice waiting to be sent by the `account_send_outbox` command."""
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    # Dotted path to the notice class and its keyword arguments as JSON
+    notice = models.CharField(max_length=255)
+    arguments = models.TextField()
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxEmailManager()
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "id"], name="account_outbox_status_idx")
+        ]
+        verbose_name = "Outbox email"
+        verbose_name_plural = "Outbox emails"
+
+    def __str__(self):
+        return "{} ({})".format(self.notice, self.status)
+
+
+class UserSearchToken(models.Model):
+    """A normalised word of a user name or email, used for autocomplete."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    token = models.CharField(max_length=64, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "token")
+
+    def __str__(self):
+        return self.token
+
+
+class ObjectPermission(models.Model):
+    """A permission granted to a user or a group on a single object."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="object_permissions",
+    )
+    group = models.ForeignKey(
+        "auth.Group",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="object_permissions",
+    )
+    permission = models.ForeignKey("auth.Permission", on_delete=models.CASCADE)
+    content_type = models.ForeignKey(
+        "contenttypes.ContentType", on_delete=models.CASCADE
+    )
+    object_id = models.PositiveIntegerField()
+
+    objects = ObjectPermissionManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "content_type", "permission", "object_id"],
+                name="account_objperm_user_idx",
+            ),
+            models.Index(
+                fields=["group", "content_type", "permission", "object_id"],
+                name="account_objperm_group_idx",
+            ),
+            models.Index(
+                fields=["content_type", "object_id"], name="account_objperm_obj_idx"
+            ),
+        ]
+        verbose_name = "Object permission"
+        verbose_name_plural = "Object permissions"
+
+    def __str__(self):
+        return "{} on {} #{}".format(
+            self.permission.codename, self.content_type, self.object_id
+        )
+
+
+class GroupParent(models.Model):
+    """Make a group (role) inherit the permissions of a parent group."""
+
+    parent = models.ForeignKey(
+        "auth.Group", on_delete=models.CASCADE, related_name="child_links"
+    )
+    child = models.ForeignKey(
+        "auth.Group", on_delete=models.CASCADE, related_name="parent_links"
+    )
+
+    class Meta:
+        unique_together = ("parent", "child")
+        verbose_name = "Group parent"
+        verbose_name_plural = "Group parents"
+
+    def __str__(self):
+        return "{} > {}".format(self.parent_id, self.child_id)
+
+
+class GroupClosure(models.Model):
+    """
+    The ancestors of every group, including itself, maintained from
+    `GroupParent` by the signals.
+    """
+
+    ancestor = models.ForeignKey(
+        "auth.Group", on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        "auth.Group", on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    # Number of distinct paths from the ancestor to the descendant
+    paths = models.PositiveIntegerField(default=1)
+
+    objects = GroupClosureManager()
+
+    class Meta:
+        unique_together = ("descendant", "ancestor")
+        verbose_name = "Group closure"
+        verbose_name_plural = "Group closures"
+
+    def __str__(self):
+        return "{} > {}".format(self.ancestor_id, self.descendant_id)
 
 
 @receiver(post_save, sender=User)
@@ -0,0 +1,99 @@
+"""
+Custom migration operations.
+
+PostgreSQL can build an index without locking the table against writes
+(`CREATE INDEX CONCURRENTLY`), which Django 2.2 does not expose. Those
+statements can not run inside a transaction, so migrations using them must set
+`atomic = False`. Other vendors fall back to a plain `CREATE INDEX`.
+
+"""
+from django.db.migrations.operations.base import Operation
+
+
+class CreateIndexConcurrently(Operation):
+    """Create an index, concurrently when the database supports it.
+
+    `expressions` is a list of raw SQL column expressions, which allows
+    functional indexes (eg: `LOWER(email)`) and operator classes (eg:
+    `email gin_trgm_ops`). `using` sets the index method on PostgreSQL.
+    `vendors` restricts the operation to the given database vendors.
+
+    The operation doesn't alter the project state; wrap it in a
+    `SeparateDatabaseAndState` when the index is also declared on the model.
+
+    """
+
+    reversible = True
+    reduces_to_sql = True
+
+    def __init__(
+        self, model_name, name, expressions, unique=False, using=None, vendors=None
+    ):
+        self.model_name = model_name
+        self.name = name
+        self.expressions = list(expressions)
+        self.unique = unique
+        self.using = using
+        self.vendors = vendors
+
+    def deconstruct(self):
+        kwargs = {
+            "model_name": self.model_name,
+            "name": self.name,
+            "expressions": self.expressions,
+        }
+        if self.unique:
+            kwargs["unique"] = self.unique
+        if self.using:
+            kwargs["using"] = self.using
+        if self.vendors:
+            kwargs["vendors"] = self.vendors
+        return (self.__class__.__name__, [], kwargs)
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def allowed(self, schema_editor, model):
+        if self.vendors and schema_editor.connection.vendor not in self.vendors:
+            return False
+        return self.allow_migrate_model(schema_editor.connection.alias, model)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allowed(schema_editor, model):
+            schema_editor.execute(self.create_sql(model, schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allowed(schema_editor, model):
+            schema_editor.execute(self.drop_sql(model, schema_editor))
+
+    def create_sql(self, model, schema_editor):
+        vendor = schema_editor.connection.vendor
+        sql = "CREATE {unique}INDEX {concurrently}{if_not_exists}{name} ON {table}"
+        sql = sql.format(
+            unique="UNIQUE " if self.unique else "",
+            concurrently="CONCURRENTLY " if vendor == "postgresql" else "",
+            if_not_exists=(
+                "IF NOT EXISTS " if vendor in ("postgresql", "sqlite") else ""
+            ),
+            name=schema_editor.quote_name(self.name),
+            table=schema_editor.quote_name(model._meta.db_table),
+        )
+        if self.using and vendor == "postgresql":
+            sql += " USING {}".format(self.using)
+        return "{} ({})".format(sql, ", ".join(self.expressions))
+
+    def drop_sql(self, model, schema_editor):
+        vendor = schema_editor.connection.vendor
+        name = schema_editor.quote_name(self.name)
+        if vendor == "postgresql":
+            return "DROP INDEX CONCURRENTLY IF EXISTS {}".format(name)
+        if vendor == "mysql":
+            return "DROP INDEX {} ON {}".format(
+                name, schema_editor.quote_name(model._meta.db_table)
+            )
+        return "DROP INDEX IF EXISTS {}".format(name)
+
+    def describe(self):
+        return "Create index {} on {}".format(self.name, self.model_name)
@@ -0,0 +1,222 @@
+"""
+Two-factor authentication state.
+
+Each user has a version stamp for their OTP devices, bumped whenever one of
+their devices is saved or deleted. The default device of a user is cached for
+the current version, and a verified session remembers the device and version
+it was verified with, so that the following requests don't read the device
+tables until the devices of the user change. The default device and the
+verified state are only cached with a shared `ACCOUNT_CACHE_BACKEND`: the
+in-process cache of another process wouldn't see the version bumped when a
+device is saved or removed.
+
+The backup tokens are the tokens of the static device named "backup".
+
+The OTP forms count the failed verifications per user and per IP address, and
+remember the tokens recently accepted for a user, in the account cache. Too
+many failures, or a replayed token, are rejected before reading the device
+tables.
+
+"""
+from django.contrib.auth import SESSION_KEY
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import QuerySet
+
+from django_otp import device_classes
+from django_otp.plugins.otp_static.models import StaticToken
+from two_factor.utils import default_device
+
+from cotidia.account.cache import bump_version, get_cache, get_version, make_key
+from cotidia.account.conf import settings
+
+BACKUP_DEVICE_NAME = "backup"
+
+# How long an accepted token is remembered, longer than a TOTP token is valid
+# for with the default step and tolerance.
+REPLAY_TIMEOUT = 120
+
+# Session key of the OTP device the session was verified with, set by
+# `django_otp.login()`.
+DEVICE_ID_SESSION_KEY = "otp_device_id"
+
+# Session key of the device and device version the session was last found
+# verified with.
+VERIFIED_SESSION_KEY = "_account_otp_verified"
+
+
+def get_device_version(user_id):
+    return get_version("devices", user_id)
+
+
+def invalidate_devices(user_id):
+    """Invalidate the cached device state of a user, and their sessions."""
+    bump_version("devices", user_id)
+
+
+@transaction.atomic
+def remove_devices(users):
+    """
+    Delete the OTP devices of the users (a queryset or a list), with one
+    `delete()` per device model. Return the number of users who had devices.
+
+    The deletion signals invalidate the device state of the users.
+    """
+    if isinstance(users, QuerySet):
+        users = users.order_by().values("pk")
+    else:
+        users = [user.pk for user in users]
+
+    user_ids = set()
+    for device_class in device_classes():
+        devices = device_class.objects.filter(user__in=users)
+        user_ids.update(devices.values_list("user_id", flat=True))
+        devices.delete()
+    return len(user_ids)
+
+
+def get_default_device_id(user):
+    """
+    Return the persistent id of the default device of a user, or `None`.
+
+    The id is memoised on the user, and cached only with a shared
+    `ACCOUNT_CACHE_BACKEND`, for the same reason as the verified state.
+    """
+    if not hasattr(user, "_default_device_id"):
+        if settings.ACCOUNT_CACHE_BACKEND:
+            key = make_key("default-device", user.pk, get_device_version(user.pk))
+            cache = get_cache()
+            device_id = cache.get(key)
+            if device_id is None:
+                device = default_device(user)
+                device_id = device.persistent_id if device else ""
+                cache.set(key, device_id)
+        else:
+            device = default_device(user)
+            device_id = device.persistent_id if device else ""
+        user._default_device_id = device_id or None
+    return user._default_device_id
+
+
+def remember_verified(session, user_id):
+    """
+    Store the device the session is verified with, if the device versions are
+    kept in a shared cache.
+    """
+    device_id = session.get(DEVICE_ID_SESSION_KEY)
+    if device_id and settings.ACCOUNT_CACHE_BACKEND:
+        session[VERIFIED_SESSION_KEY] = [device_id, get_device_version(user_id)]
+
+
+def forget_verified(session):
+    session.pop(VERIFIED_SESSION_KEY, None)
+
+
+def is_session_verified(session, user_id=None):
+    """
+    Whether the session was found verified with its current device, and the
+    devices of the user didn't change since.
+    """
+    if not settings.ACCOUNT_CACHE_BACKEND:
+        return False
+    if user_id is None:
+        user_id = session.get(SESSION_KEY)
+    device_id = session.get(DEVICE_ID_SESSION_KEY)
+    if not user_id or not device_id:
+        return False
+    state = session.get(VERIFIED_SESSION_KEY)
+    return state == [device_id, get_device_version(user_id)]
+
+
+def get_backup_tokens(user):
+    """Return the backup tokens of a user, without creating their device."""
+    return list(
+        StaticToken.objects.filter(
+            device__user=user, device__name=BACKUP_DEVICE_NAME
+        ).values_list("token", flat=True)
+    )
+
+
+def has_backup_tokens(user):
+    return StaticToken.objects.filter(
+        device__user=user, device__name=BACKUP_DEVICE_NAME
+    ).exists()
+
+
+@transaction.atomic
+def regenerate_backup_tokens(user, count=None):
+    """
+    Replace the backup tokens of a user with `count` new ones (by default
+    `ACCOUNT_BACKUP_TOKEN_COUNT`), return the backup device and the tokens.
+    """
+    if count is None:
+        count = settings.ACCOUNT_BACKUP_TOKEN_COUNT
+    device = user.staticdevice_set.get_or_create(name=BACKUP_DEVICE_NAME)[0]
+    device.token_set.all().delete()
+    tokens = StaticToken.objects.bulk_create(
+        StaticToken(device=device, token=StaticToken.random_token())
+        for n in range(count)
+    )
+    return device, [token.token for token in tokens]
+
+
+def get_attempt_keys(user_id, ip=None):
+    keys = [make_key("otp-attempts", "user", user_id)]
+    if ip:
+        keys.append(make_key("otp-attempts", "ip", ip))
+    return keys
+
+
+def is_throttled(user_id, ip=None):
+    """Whether the user or IP address failed too many verifications."""
+    attempts = get_cache().get_many(get_attempt_keys(user_id, ip))
+    return any(
+        count >= settings.ACCOUNT_OTP_MAX_ATTEMPTS for count in attempts.values()
+    )
+
+
+def record_failure(user_id, ip=None):
+    cache = get_cache()
+    for key in get_attempt_keys(user_id, ip):
+        cache.add(key, 0, settings.ACCOUNT_OTP_ATTEMPT_WINDOW)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, settings.ACCOUNT_OTP_ATTEMPT_WINDOW)
+
+
+def reset_failures(user_id):
+    get_cache().delete(make_key("otp-attempts", "user", user_id))
+
+
+def is_token_used(user_id, token):
+    return get_cache().get(make_key("otp-used", user_id, token)) is not None
+
+
+def mark_token_used(user_id, token):
+    get_cache().set(make_key("otp-used", user_id, token), True, REPLAY_TIMEOUT)
+
+
+def guard_token(user_id, token, verify, ip=None):
+    """
+    Run `verify()` for a token of a user, unless the user or IP address failed
+    too many verifications or the token was already used, and record the
+    outcome. `verify()` raises a `ValidationError` for an invalid token.
+    """
+    if is_throttled(user_id, ip):
+        raise ValidationError(
+            "Too many attempts, please try again later.", code="throttled"
+        )
+    if is_token_used(user_id, token):
+        record_failure(user_id, ip)
+        raise ValidationError("This token has already been used.", code="replayed")
+
+    try:
+        result = verify()
+    except ValidationError:
+        record_failure(user_id, ip)
+        raise
+
+    mark_token_used(user_id, token)
+    reset_failures(user_id)
+    return result
@@ -0,0 +1,106 @@
+"""
+Deliver the emails queued in the outbox.
+
+Entries are claimed in batches: the claiming transaction locks the rows with
+`SELECT ... FOR UPDATE SKIP LOCKED` where the database supports it, so that
+several workers can run side by side without sending the same email twice.
+The claimed emails are then sent from a thread pool, keeping the SMTP latency
+off the request/response cycle.
+
+"""
+import json
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+from cotidia.account.conf import settings
+from cotidia.account.models import OutboxEmail
+
+
+def claim_batch(batch_size):
+    """Mark a batch of pending emails as being sent and return them."""
+
+    # Failed emails are retried after a delay
+    retry = now() - timedelta(seconds=settings.ACCOUNT_EMAIL_OUTBOX_RETRY_DELAY)
+    # Emails claimed by a worker which died before sending them
+    stale = now() - timedelta(seconds=settings.ACCOUNT_EMAIL_OUTBOX_CLAIM_TIMEOUT)
+
+    with transaction.atomic():
+        queryset = OutboxEmail.objects.filter(
+            Q(status=OutboxEmail.STATUS_PENDING, claimed_at__isnull=True)
+            | Q(status=OutboxEmail.STATUS_PENDING, claimed_at__lt=retry)
+            | Q(status=OutboxEmail.STATUS_SENDING, claimed_at__lt=stale)
+        ).order_by("id")
+
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        elif connection.features.has_select_for_update:
+            queryset = queryset.select_for_update()
+
+        ids = list(queryset.values_list("id", flat=True)[:batch_size])
+
+        OutboxEmail.objects.filter(id__in=ids).update(
+            status=OutboxEmail.STATUS_SENDING,
+            claimed_at=now(),
+            attempts=F("attempts") + 1,
+        )
+
+    return list(OutboxEmail.objects.filter(id__in=ids))
+
+
+def send_email(email):
+    """Send an outbox email, return the error traceback if it failed."""
+    try:
+        notice_class = import_string(email.notice)
+        notice = notice_class(**json.loads(email.arguments))
+        notice.send(force_now=True)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def send_email_in_thread(email):
+    try:
+        return send_email(email)
+    finally:
+        # Each thread opens its own database connection if the notice
+        # needs one.
+        connection.close()
+
+
+def process_batch(batch_size=100, workers=4):
+    """Send a batch of emails and return the number of sent and failed."""
+
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = list(executor.map(send_email_in_thread, emails))
+    else:
+        errors = [send_email(email) for email in emails]
+
+    sent_ids = [email.id for email, error in zip(emails, errors) if error is None]
+    OutboxEmail.objects.filter(id__in=sent_ids).update(
+        status=OutboxEmail.STATUS_SENT, sent_at=now(), last_error=""
+    )
+
+    failed = 0
+    for email, error in zip(emails, errors):
+        if error is None:
+            continue
+        failed += 1
+        if email.attempts >= settings.ACCOUNT_EMAIL_OUTBOX_MAX_ATTEMPTS:
+            status = OutboxEmail.STATUS_FAILED
+        else:
+            status = OutboxEmail.STATUS_PENDING
+        OutboxEmail.objects.filter(id=email.id).update(status=status, last_error=error)
+
+    return len(sent_ids), failed
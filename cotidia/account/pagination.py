@@ -0,0 +1,174 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of an `OFFSET`, each page starts right after the last row of the
+previous one, comparing the ordering columns with the row values encoded in
+the cursor. With an index on the ordering columns, fetching any page costs the
+same whatever its depth, and no `COUNT(*)` is needed.
+
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+
+
+def encode_cursor(direction, values):
+    data = json.dumps([direction] + list(values)).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def decode_cursor(cursor, size=None):
+    """
+    Return the direction and values of a cursor, `None` if invalid or if it
+    doesn't have `size` values.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    if not isinstance(data, list) or not data or data[0] not in ["next", "previous"]:
+        return None
+    values = data[1:]
+    if size is not None and len(values) != size:
+        return None
+    # None can't be compared in a range lookup
+    if not all(isinstance(value, (str, int, float)) for value in values):
+        return None
+    return data[0], values
+
+
+def keyset_filter(fields, values, lookup):
+    """
+    Build the condition selecting the rows after (`gt`) or before (`lt`)
+    the given values, eg for `(a, b, c)`:
+
+        a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z))
+
+    The redundant `a >= x` lets the database start the index scan at the
+    cursor, which it can't derive from the `OR`.
+
+    """
+    condition = Q()
+    for index, field in enumerate(fields):
+        q = Q(**{"{}__{}".format(field, lookup): values[index]})
+        for previous in range(index):
+            q &= Q(**{fields[previous]: values[previous]})
+        condition |= q
+    start = Q(**{"{}__{}e".format(fields[0], lookup): values[0]})
+    return start & condition
+
+
+def approximate_count(queryset):
+    """
+    Return the planner estimate of the number of rows of a queryset.
+
+    Only supported on PostgreSQL, return `None` for the other databases.
+
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.approximate_count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on unique, ascending ordering fields.
+
+    The last field must be unique (eg: the primary key) so that every row has
+    a distinct position.
+
+    """
+
+    def __init__(self, queryset, ordering, per_page, count=False):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.count = count
+
+    def get_values(self, obj):
+        return [getattr(obj, field) for field in self.ordering]
+
+    def clean_values(self, values):
+        """Convert the values of a cursor, `None` if they don't fit the fields."""
+        opts = self.queryset.model._meta
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            try:
+                value = opts.get_field(field).to_python(value)
+            except FieldDoesNotExist:
+                # Ordering on a relation, left to the database
+                pass
+            except ValidationError:
+                return None
+            cleaned.append(value)
+        return cleaned
+
+    def page(self, cursor=None):
+        decoded = decode_cursor(cursor, len(self.ordering)) if cursor else None
+        direction, values = decoded if decoded else ("next", None)
+        if values is not None:
+            values = self.clean_values(values)
+            if values is None:
+                direction = "next"
+
+        queryset = self.queryset
+        if direction == "next":
+            if values is not None:
+                queryset = queryset.filter(keyset_filter(self.ordering, values, "gt"))
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.filter(keyset_filter(self.ordering, values, "lt"))
+            queryset = queryset.order_by(*["-" + field for field in self.ordering])
+
+        # Fetch an extra row to know if there is more in that direction
+        object_list = list(queryset[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+
+        if direction == "next":
+            has_next, has_previous = has_more, values is not None
+        else:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = encode_cursor("next", self.get_values(object_list[-1]))
+        if object_list and has_previous:
+            previous_cursor = encode_cursor(
+                "previous", self.get_values(object_list[0])
+            )
+
+        count = approximate_count(self.queryset) if self.count else None
+        return KeysetPage(object_list, next_cursor, previous_cursor, count)
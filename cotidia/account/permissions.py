@@ -0,0 +1,47 @@
+"""
+Permission choices for the permission picker.
+
+The permissions are listed grouped by app and model. The list is built with a
+single query and cached until the next `post_migrate` (or a permission is
+created or deleted), as it only changes when models are installed.
+
+"""
+from django.apps import apps
+from django.contrib.auth.models import Permission
+
+from cotidia.account.cache import get_cache, get_version, make_key
+
+
+def get_group_label(content_type):
+    try:
+        app_label = apps.get_app_config(content_type.app_label).verbose_name
+    except LookupError:
+        app_label = content_type.app_label
+    model = content_type.model_class()
+    model_label = model._meta.verbose_name if model else content_type.model
+    return "{} | {}".format(str(app_label).capitalize(), str(model_label).capitalize())
+
+
+def build_permission_groups():
+    groups = []
+    permissions = Permission.objects.select_related("content_type").order_by(
+        "content_type__app_label", "content_type__model", "codename"
+    )
+    for permission in permissions:
+        content_type = permission.content_type
+        if not groups or groups[-1][0] != content_type.pk:
+            groups.append((content_type.pk, get_group_label(content_type), []))
+        groups[-1][2].append((permission.pk, permission.name))
+    return [(label, choices) for _, label, choices in groups]
+
+
+def get_permission_groups():
+    """Return the permissions as `[(group label, [(pk, name), ...]), ...]`."""
+    cache = get_cache()
+    key = make_key("permission-choices", get_version("permission-choices"))
+
+    groups = cache.get(key)
+    if groups is None:
+        groups = build_permission_groups()
+        cache.set(key, groups, None)
+    return groups
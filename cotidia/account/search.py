@@ -0,0 +1,267 @@
+"""
+Search backends for the user lists.
+
+A backend filters a user queryset for a search string and orders the matches
+by relevance (best first). The backend is picked by
+`ACCOUNT_USER_SEARCH_BACKEND`; by default PostgreSQL uses the trigram index
+and the other databases the `icontains` scan.
+
+- `IContainsSearch`: `icontains` on the name and email, no index.
+- `TrigramSearch`: PostgreSQL `pg_trgm` GIN index over the name and email,
+  ranked by similarity. Same matches as `IContainsSearch`.
+- `SQLiteFTSSearch`: SQLite FTS5 prefix search, ranked with BM25. Meant for
+  local development and tests. Falls back to `IContainsSearch` when SQLite is
+  built without FTS5, as the migration then skips the index.
+
+"""
+import re
+import uuid
+
+from django.db import DatabaseError, connections
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from cotidia.account.conf import settings
+
+SEARCH_DOCUMENT = "LOWER({first_name} || ' ' || {last_name} || ' ' || {email})"
+
+FTS_TABLE = "account_user_search"
+
+# Statements are idempotent so they can be replayed after a migration rebuilt
+# the user table (SQLite drops the triggers with the table).
+FTS_INSTALL_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS account_user_search USING fts5("
+    "first_name, last_name, email, content='account_user', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS account_user_search_insert "
+    "AFTER INSERT ON account_user BEGIN "
+    "INSERT INTO account_user_search(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS account_user_search_delete "
+    "AFTER DELETE ON account_user BEGIN "
+    "INSERT INTO account_user_search"
+    "(account_user_search, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS account_user_search_update "
+    "AFTER UPDATE ON account_user BEGIN "
+    "INSERT INTO account_user_search"
+    "(account_user_search, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    "INSERT INTO account_user_search(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "INSERT INTO account_user_search(account_user_search) VALUES ('rebuild')",
+]
+
+FTS_UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS account_user_search_insert",
+    "DROP TRIGGER IF EXISTS account_user_search_delete",
+    "DROP TRIGGER IF EXISTS account_user_search_update",
+    "DROP TABLE IF EXISTS account_user_search",
+]
+
+
+def has_fts5(connection):
+    """Whether the SQLite library supports FTS5, built in or loaded."""
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE temp.account_fts5_check USING fts5(value)"
+            )
+        except DatabaseError:
+            return False
+        cursor.execute("DROP TABLE temp.account_fts5_check")
+    return True
+
+
+_fts_indexes = {}
+
+
+def has_fts_index(connection):
+    """Whether the full-text index is installed, checked once per database."""
+    if connection.alias not in _fts_indexes:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FTS_TABLE],
+            )
+            _fts_indexes[connection.alias] = cursor.fetchone() is not None
+    return _fts_indexes[connection.alias]
+
+
+def install_fts(connection):
+    """
+    Create or repair the SQLite full-text index of the users. Skipped when
+    SQLite doesn't support FTS5.
+    """
+    if connection.vendor != "sqlite" or not has_fts5(connection):
+        return
+    with connection.cursor() as cursor:
+        for statement in FTS_INSTALL_SQL:
+            cursor.execute(statement)
+    _fts_indexes.pop(connection.alias, None)
+
+
+def ensure_fts(connection):
+    """Repair the SQLite full-text index if its triggers went missing."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [
+                FTS_TABLE,
+                "account_user_search_insert",
+                "account_user_search_delete",
+                "account_user_search_update",
+            ],
+        )
+        types = [row[0] for row in cursor.fetchall()]
+    # Only repair an installed index, the migration creates it
+    if "table" in types and len(types) < 4:
+        install_fts(connection)
+
+
+def uninstall_fts(connection):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for statement in FTS_UNINSTALL_SQL:
+            cursor.execute(statement)
+    _fts_indexes.pop(connection.alias, None)
+
+
+class BaseUserSearch:
+    def search(self, queryset, value):
+        """Return the users of `queryset` matching `value`, best first."""
+        value = value.strip()
+        if not value:
+            return queryset
+
+        try:
+            return queryset.filter(uuid=uuid.UUID(value, version=4))
+        except ValueError:
+            pass
+
+        return self.filter(queryset, value).order_by(
+            "-search_rank", *queryset.model._meta.ordering, "id"
+        )
+
+    def filter(self, queryset, value):
+        """Filter the queryset and annotate it with a `search_rank`."""
+        raise NotImplementedError
+
+
+class IContainsSearch(BaseUserSearch):
+    def filter(self, queryset, value):
+        queryset = queryset.filter(
+            Q(first_name__icontains=value)
+            | Q(last_name__icontains=value)
+            | Q(email__icontains=value)
+        )
+        return queryset.annotate(
+            search_rank=Case(
+                When(email__iexact=value, then=Value(2)),
+                When(
+                    Q(first_name__istartswith=value)
+                    | Q(last_name__istartswith=value)
+                    | Q(email__istartswith=value),
+                    then=Value(1),
+                ),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+
+
+class TrigramSearch(BaseUserSearch):
+    """
+    Substring search through the `account_user_search_trgm` GIN index.
+
+    The `LIKE` and `similarity()` arguments must match the indexed expression
+    for PostgreSQL to use the index.
+    """
+
+    def get_document(self, queryset):
+        connection = connections[queryset.db]
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        columns = {
+            name: "{}.{}".format(table, connection.ops.quote_name(name))
+            for name in ["first_name", "last_name", "email"]
+        }
+        return SEARCH_DOCUMENT.format(**columns)
+
+    def filter(self, queryset, value):
+        connection = connections[queryset.db]
+        document = self.get_document(queryset)
+        pattern = "%{}%".format(connection.ops.prep_for_like_query(value.lower()))
+        # Filtering on the boolean keeps the `LIKE` on the indexed expression,
+        # PostgreSQL simplifies the `= true`
+        queryset = queryset.annotate(
+            search_match=RawSQL(
+                "{} LIKE %s".format(document), [pattern], output_field=BooleanField()
+            )
+        ).filter(search_match=True)
+        return queryset.annotate(
+            search_rank=RawSQL("similarity({}, %s)".format(document), [value.lower()])
+        )
+
+
+class SQLiteFTSSearch(BaseUserSearch):
+    """
+    Prefix search on the words of the name and email, or `icontains` if the
+    index isn't installed.
+    """
+
+    def get_match(self, value):
+        words = re.findall(r"\w+", value)
+        return " ".join('"{}"*'.format(word) for word in words)
+
+    def filter(self, queryset, value):
+        match = self.get_match(value)
+        if not match:
+            return queryset.none().annotate(search_rank=Value(0, IntegerField()))
+
+        connection = connections[queryset.db]
+        if not has_fts_index(connection):
+            return IContainsSearch().filter(queryset, value)
+
+        pk = "{}.{}".format(
+            connection.ops.quote_name(queryset.model._meta.db_table),
+            connection.ops.quote_name("id"),
+        )
+        queryset = queryset.filter(
+            pk__in=RawSQL(
+                "SELECT rowid FROM {} WHERE {} MATCH %s".format(FTS_TABLE, FTS_TABLE),
+                [match],
+            )
+        )
+        # FTS5 ranks the best matches with the lowest (negative) BM25 score
+        return queryset.annotate(
+            search_rank=RawSQL(
+                "(SELECT -rank FROM {} WHERE {} MATCH %s AND rowid = {})".format(
+                    FTS_TABLE, FTS_TABLE, pk
+                ),
+                [match],
+            )
+        )
+
+
+DEFAULT_BACKENDS = {"postgresql": "cotidia.account.search.TrigramSearch"}
+
+_backends = {}
+
+
+def get_search_backend(using="default"):
+    """Return the search backend for a database alias."""
+    path = settings.ACCOUNT_USER_SEARCH_BACKEND
+    if path is None:
+        path = DEFAULT_BACKENDS.get(
+            connections[using].vendor, "cotidia.account.search.IContainsSearch"
+        )
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def search_users(queryset, value):
+    return get_search_backend(queryset.db).search(queryset, value)
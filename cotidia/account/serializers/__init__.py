@@ -2,12 +2,18 @@ import hashlib
 
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.auth import authenticate
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.timezone import now
 from cotidia.account.conf import settings
 
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 
+from django_otp.models import Device
+
+from cotidia.account.exceptions import LoginCapacityExceeded
 from cotidia.account.models import User
+from cotidia.account.otp import get_default_device_id, guard_token
+from cotidia.account.throttling import get_client_ip
 from cotidia.account.validators import is_alpha
 
 
@@ -143,7 +149,16 @@ class SignInTokenSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username and password:
-            user = authenticate(username=username, password=password)
+            try:
+                user = authenticate(
+                    request=self.context.get("request"),
+                    username=username,
+                    password=password
+                )
+            except LoginCapacityExceeded:
+                raise exceptions.Throttled(
+                    wait=settings.ACCOUNT_LOGIN_RETRY_AFTER
+                )
 
             if user:
                 if not user.is_active:
@@ -288,3 +303,55 @@ class ChangePasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError(_("The passwords didn't match."))
 
         return data
+
+
+class BackupTokensSerializer(serializers.Serializer):
+    password = serializers.CharField(error_messages={
+        'required': _("The password is required."),
+        'invalid': _("The password is invalid.")
+    })
+    otp_token = serializers.CharField(required=False, allow_blank=True)
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop("user")
+        super().__init__(*args, **kwargs)
+
+    def validate_password(self, value):
+
+        if not self.user.check_password(value):
+            raise serializers.ValidationError(_("The password is invalid."))
+
+        return value
+
+    def validate(self, data):
+        # A session verified by the OTP middleware already passed the second
+        # factor, otherwise a token of the default device is required
+        is_verified = getattr(self.user, "is_verified", None)
+        if is_verified is not None and is_verified():
+            return data
+
+        token = data.get("otp_token")
+        if not token:
+            raise serializers.ValidationError(
+                {"otp_token": _("The two-factor token is required.")}
+            )
+
+        def verify():
+            device = Device.from_persistent_id(get_default_device_id(self.user))
+            if device is None or not device.verify_token(token):
+                raise DjangoValidationError(
+                    _("The two-factor token is invalid."), code="invalid"
+                )
+
+        guard_token(
+            self.user.pk, token, verify, get_client_ip(self.context.get("request"))
+        )
+        return data
+
+
+class UserAutocompleteSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source="get_full_name")
+
+    class Meta:
+        model = User
+        fields = ("uuid", "name", "email")
@@ -0,0 +1,11 @@
+from django.http import Http404
+
+from cotidia.account.models import User
+
+
+def get_user_or_404(uuid):
+    """Return the user for the given uuid or raise a 404."""
+    try:
+        return User.objects.get_by_uuid(uuid)
+    except User.DoesNotExist:
+        raise Http404("No user matches the given uuid.")
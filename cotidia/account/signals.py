@@ -1,12 +1,163 @@
+from django.db import connections, transaction
+from django.db.models import Q
 from django.dispatch import Signal, receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import (
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+    post_migrate,
+)
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
 
-from cotidia.account.models import User
+from rest_framework.authtoken.models import Token
+
+from django_otp import device_classes
+
+from cotidia.account.authentication import invalidate_token, invalidate_user_tokens
+from cotidia.account.cache import bump_version
+from cotidia.account.models import (
+    User,
+    ObjectPermission,
+    GroupParent,
+    GroupClosure,
+)
+from cotidia.account.otp import invalidate_devices
+from cotidia.account.search import ensure_fts
+from cotidia.account.autocomplete import TOKEN_FIELDS, index_user
 
 
 @receiver(post_save, sender=User)
 def user_update(sender, instance, created, **kwargs):
-    pass
+    # Any change to the user (password, active state, details) must be seen
+    # by the next token authenticated request. Invalidate again on commit in
+    # case a concurrent request cached the previous state in the meantime.
+    if not created:
+        invalidate_user_tokens([instance.pk])
+        bump_version("user", instance.pk)
+        transaction.on_commit(lambda: invalidate_user_tokens([instance.pk]))
+        transaction.on_commit(lambda: bump_version("user", instance.pk))
+
+
+@receiver(post_save, sender=User)
+def user_autocomplete_update(sender, instance, update_fields, raw, **kwargs):
+    # Skip the saves that can't change the tokens (eg: `last_login`)
+    if raw or (update_fields and not set(update_fields) & set(TOKEN_FIELDS)):
+        return
+    index_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_delete(sender, instance, **kwargs):
+    invalidate_user_tokens([instance.pk])
+    bump_version("user", instance.pk)
+    # The grants on the user aren't tied to it by a foreign key
+    ObjectPermission.objects.filter(
+        content_type=ContentType.objects.get_for_model(User), object_id=instance.pk
+    ).delete()
+
+
+@receiver(post_delete, sender=Token)
+def token_delete(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_relations_update(sender, instance, action, reverse, pk_set, **kwargs):
+    """Bump the version of the users whose groups or permissions changed."""
+
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        # Collect the users before the relations are removed
+        instance._cleared_user_ids = list(
+            instance.user_set.values_list("pk", flat=True)
+        )
+        return
+    elif action == "post_clear":
+        user_ids = getattr(instance, "_cleared_user_ids", [])
+    else:
+        user_ids = pk_set
+
+    if action in ["post_add", "post_remove", "post_clear"]:
+        for user_id in user_ids:
+            bump_version("user", user_id)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_update(sender, action, **kwargs):
+    """Invalidate every cached permission set when a group changes."""
+    if action in ["post_add", "post_remove", "post_clear"]:
+        bump_version("perms")
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def permissions_delete(sender, **kwargs):
+    # The relations are deleted without sending `m2m_changed`
+    bump_version("perms")
+
+
+@receiver(post_save, sender=Group)
+def group_create(sender, instance, created, **kwargs):
+    if created:
+        GroupClosure.objects.add_group(instance.pk)
+
+
+@receiver(pre_delete, sender=Group)
+def group_hierarchy_delete(sender, instance, **kwargs):
+    # Remove the edges one by one while the closure rows of the group still
+    # exist, so that the paths going through it are subtracted.
+    for link in GroupParent.objects.filter(Q(parent=instance) | Q(child=instance)):
+        link.delete()
+
+
+@receiver(post_save, sender=GroupParent)
+def group_parent_add(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        GroupClosure.objects.add_edge(instance.parent_id, instance.child_id)
+        bump_version("perms")
+
+
+@receiver(post_delete, sender=GroupParent)
+def group_parent_remove(sender, instance, **kwargs):
+    GroupClosure.objects.remove_edge(instance.parent_id, instance.child_id)
+    bump_version("perms")
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def permission_list_update(sender, **kwargs):
+    bump_version("permission-choices")
+
+
+@receiver(post_migrate)
+def permission_list_migrate(sender, **kwargs):
+    # Installing or removing a model changes the permissions, with
+    # `bulk_create` which doesn't send `post_save`.
+    bump_version("permission-choices")
+
+
+def device_update(sender, instance, **kwargs):
+    # Saving or deleting a device changes the default device of the user and
+    # invalidates the sessions verified with a previous state.
+    invalidate_devices(instance.user_id)
+    transaction.on_commit(lambda: invalidate_devices(instance.user_id))
+
+
+for device_class in device_classes():
+    post_save.connect(device_update, sender=device_class)
+    post_delete.connect(device_update, sender=device_class)
+
+
+@receiver(post_migrate)
+def user_search_repair(sender, using, **kwargs):
+    # SQLite rebuilds a table to alter it, which drops its triggers
+    if sender.label == "account":
+        ensure_fts(connections[using])
+
 
 # Account registraton signals
 user_sign_up = Signal(providing_args=["request", "user"])
@@ -0,0 +1,76 @@
+/*
+ * Build the checkboxes of the lazy permission pickers from the permission
+ * list API. The selected permissions are rendered as hidden inputs, which are
+ * replaced by checked checkboxes.
+ */
+(function () {
+  'use strict'
+
+  function render (picker, groups) {
+    var name = picker.getAttribute('data-name')
+    var selected = {}
+    var hidden = picker.querySelectorAll('input[type=hidden]')
+    var i, j
+
+    for (i = 0; i < hidden.length; i++) {
+      selected[hidden[i].value] = true
+    }
+
+    var list = document.createElement('ul')
+    for (i = 0; i < groups.length; i++) {
+      var group = document.createElement('li')
+      group.appendChild(document.createTextNode(groups[i].label))
+
+      var choices = document.createElement('ul')
+      for (j = 0; j < groups[i].permissions.length; j++) {
+        var permission = groups[i].permissions[j]
+        var item = document.createElement('li')
+        var label = document.createElement('label')
+        var input = document.createElement('input')
+        input.type = 'checkbox'
+        input.name = name
+        input.value = permission.id
+        input.checked = selected[String(permission.id)] === true
+        label.appendChild(input)
+        label.appendChild(document.createTextNode(' ' + permission.name))
+        item.appendChild(label)
+        choices.appendChild(item)
+      }
+      group.appendChild(choices)
+      list.appendChild(group)
+    }
+
+    picker.innerHTML = ''
+    picker.appendChild(list)
+  }
+
+  function load (picker) {
+    if (picker.getAttribute('data-loaded')) {
+      return
+    }
+    picker.setAttribute('data-loaded', 'true')
+
+    var request = new XMLHttpRequest()
+    request.open('GET', picker.getAttribute('data-url'))
+    request.setRequestHeader('Accept', 'application/json')
+    request.onload = function () {
+      if (request.status === 200) {
+        render(picker, JSON.parse(request.responseText))
+      }
+    }
+    request.send()
+  }
+
+  function init () {
+    var pickers = document.querySelectorAll('.permission-picker')
+    for (var i = 0; i < pickers.length; i++) {
+      load(pickers[i])
+    }
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', init)
+  } else {
+    init()
+  }
+})()
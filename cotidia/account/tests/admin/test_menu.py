@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.test import RequestFactory, TestCase
+
+from cotidia.account import fixtures, menu
+from cotidia.account.cache import get_cache
+from cotidia.account.models import User
+
+
+class AdminMenuTests(TestCase):
+
+    @fixtures.admin_user
+    @fixtures.superuser
+    def setUp(self):
+        get_cache().clear()
+        self.factory = RequestFactory()
+
+    def get_menu(self, user):
+        request = self.factory.get("/")
+        request.user = User.objects.get(pk=user.pk)
+        return menu.admin_menu({"request": request})
+
+    def item_texts(self, result):
+        return [item["text"] for section in result for item in section["nav_items"]]
+
+    def test_superuser_menu(self):
+        self.assertEqual(
+            self.item_texts(self.get_menu(self.superuser)), ["Users", "Roles"]
+        )
+
+    def test_filtered_by_permission(self):
+        self.assertEqual(self.get_menu(self.admin_user), [])
+
+        self.admin_user.user_permissions.add(
+            Permission.objects.get(codename="change_user")
+        )
+        self.assertEqual(self.item_texts(self.get_menu(self.admin_user)), ["Users"])
+
+    def test_built_once_per_permission_set(self):
+        with mock.patch.object(menu, "reverse", wraps=menu.reverse) as reverse:
+            self.get_menu(self.superuser)
+            self.get_menu(self.superuser)
+        self.assertEqual(reverse.call_count, 2)
@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from cotidia.account import fixtures
+from cotidia.account.middleware import AccountMiddleware
+from cotidia.account.otp import DEVICE_ID_SESSION_KEY
+
+
+@override_settings(
+    ACCOUNT_ENABLE_TWO_FACTOR=True,
+    ACCOUNT_FORCE_ADMIN_TWO_FACTOR=True,
+    ACCOUNT_TWO_FACTOR_EXEMPT_PATHS=["/health/"],
+)
+class AccountMiddlewareTests(TestCase):
+
+    @fixtures.admin_user
+    def setUp(self):
+        self.url = reverse("account-admin:user-list")
+        self.client.force_login(self.admin_user)
+
+    def test_unverified_redirected(self):
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse("account-admin:setup"), fetch_redirect_response=False
+        )
+
+    def test_exempt_paths(self):
+        response = self.client.get("/health/")
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(reverse("account-admin:setup"))
+        self.assertNotEqual(response.status_code, 302)
+
+    @override_settings(ACCOUNT_CACHE_BACKEND="default")
+    def test_verified_state_cached(self):
+        device = TOTPDevice.objects.create(user=self.admin_user, name="default")
+        session = self.client.session
+        session[DEVICE_ID_SESSION_KEY] = device.persistent_id
+        session.save()
+
+        response = self.client.get(self.url)
+        self.assertNotEqual(response.status_code, 302)
+
+        # The verification isn't checked again with the same device
+        with mock.patch.object(AccountMiddleware, "is_verified") as is_verified:
+            response = self.client.get(self.url)
+        self.assertNotEqual(response.status_code, 302)
+        is_verified.assert_not_called()
@@ -0,0 +1,94 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from cotidia.account import fixtures
+from cotidia.account.models import User
+from cotidia.account.pagination import KeysetPaginator, encode_cursor, keyset_filter
+
+
+class KeysetPaginatorTests(TestCase):
+
+    def setUp(self):
+        # Duplicated names make sure the id breaks the ties
+        for index in range(7):
+            User.objects.create(
+                username="user-{}".format(index),
+                email="user-{}@example.com".format(index),
+                first_name="Anna" if index % 2 else "Bob",
+                last_name="Smith",
+            )
+        self.expected = list(
+            User.objects.order_by("first_name", "last_name", "id")
+        )
+        self.paginator = KeysetPaginator(
+            User.objects.all(),
+            ordering=("first_name", "last_name", "id"),
+            per_page=3,
+        )
+
+    def test_forward_and_backward(self):
+        """Pages follow each other without gaps or duplicates."""
+
+        first = self.paginator.page()
+        self.assertEqual(first.object_list, self.expected[0:3])
+        self.assertFalse(first.has_previous())
+
+        second = self.paginator.page(first.next_cursor)
+        self.assertEqual(second.object_list, self.expected[3:6])
+
+        last = self.paginator.page(second.next_cursor)
+        self.assertEqual(last.object_list, self.expected[6:])
+        self.assertFalse(last.has_next())
+
+        back = self.paginator.page(last.previous_cursor)
+        self.assertEqual(back.object_list, self.expected[3:6])
+        back = self.paginator.page(back.previous_cursor)
+        self.assertEqual(back.object_list, self.expected[0:3])
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor(self):
+        """An invalid cursor returns the first page."""
+
+        page = self.paginator.page("not-a-cursor")
+        self.assertEqual(page.object_list, self.expected[0:3])
+
+    def test_crafted_cursor(self):
+        """A cursor with unexpected values returns the first page."""
+
+        for values in [
+            ["Anna"],
+            [{"a": 1}, "Smith", 1],
+            ["Anna", None, 1],
+            ["Anna", "Smith", "not-an-id"],
+        ]:
+            page = self.paginator.page(encode_cursor("next", values))
+            self.assertEqual(page.object_list, self.expected[0:3])
+
+    def test_index_start(self):
+        """The condition bounds the first field for the index scan."""
+
+        condition = keyset_filter(
+            ["first_name", "last_name", "id"], ["Anna", "Smith", 1], "gt"
+        )
+        sql = str(User.objects.filter(condition).query)
+        self.assertIn('"first_name" >= Anna AND', sql)
+
+
+@override_settings(ACCOUNT_USER_LIST_CURSOR_PAGINATION=True)
+class UserListCursorTests(TestCase):
+
+    @fixtures.superuser
+    def setUp(self):
+        self.client.force_login(self.superuser)
+        self.url = reverse("account-admin:user-list")
+
+    def test_cursor_mode(self):
+        response = self.client.get(self.url)
+        self.assertIsNotNone(response.context["cursor_page"])
+
+    def test_search(self):
+        """A search keeps its relevance ordering with page numbers."""
+
+        response = self.client.get(self.url, {"first_name": "smith"})
+        self.assertIsNone(response.context["cursor_page"])
+        self.assertIsNotNone(response.context["page_obj"])
@@ -0,0 +1,65 @@
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from cotidia.account import fixtures
+from cotidia.account.cache import get_cache
+from cotidia.account.forms.admin.group import GroupAddForm
+from cotidia.account.models import User
+
+
+class PermissionPickerTests(TestCase):
+
+    @fixtures.superuser
+    def setUp(self):
+        get_cache().clear()
+        self.change_user = Permission.objects.get(codename="change_user")
+
+    def test_grouped_and_cached(self):
+        """The choices are grouped by model and cached across forms."""
+
+        html = str(GroupAddForm()["permissions"])
+        self.assertIn("Account | User", html)
+        self.assertIn('value="{}"'.format(self.change_user.pk), html)
+
+        with self.assertNumQueries(0):
+            str(GroupAddForm()["permissions"])
+
+    def test_new_permission(self):
+        """Creating a permission invalidates the cached choices."""
+
+        str(GroupAddForm()["permissions"])
+        Permission.objects.create(
+            codename="export_user",
+            name="Can export user",
+            content_type=ContentType.objects.get_for_model(User),
+        )
+        self.assertIn("Can export user", str(GroupAddForm()["permissions"]))
+
+    def test_validation(self):
+        form = GroupAddForm(
+            data={"name": "Editors", "permissions": [self.change_user.pk]}
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(list(form.cleaned_data["permissions"]), [self.change_user])
+
+    @override_settings(ACCOUNT_PERMISSION_PICKER_LAZY=True)
+    def test_lazy(self):
+        """The lazy picker only renders the selected permissions."""
+
+        form = GroupAddForm(initial={"permissions": [self.change_user.pk]})
+        with self.assertNumQueries(0):
+            html = str(form["permissions"])
+        self.assertIn('type="hidden"', html)
+        self.assertNotIn('type="checkbox"', html)
+
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse("account-api:permission-list"))
+        self.assertEqual(response.status_code, 200)
+        names = [
+            permission["name"]
+            for group in response.json()
+            for permission in group["permissions"]
+        ]
+        self.assertIn(self.change_user.name, names)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from cotidia.account.models import User
+from cotidia.account.search import (
+    IContainsSearch,
+    SQLiteFTSSearch,
+    has_fts5,
+    has_fts_index,
+)
+
+
+class UserSearchTests(TestCase):
+
+    def setUp(self):
+        self.john = User.objects.create(
+            username="john",
+            email="john.smith@example.com",
+            first_name="John",
+            last_name="Smith",
+        )
+        self.jane = User.objects.create(
+            username="jane",
+            email="jane@example.com",
+            first_name="Jane",
+            last_name="Johnson",
+        )
+        self.anna = User.objects.create(
+            username="anna",
+            email="anna@example.com",
+            first_name="Anna",
+            last_name="Blacksmith",
+        )
+
+    def test_icontains(self):
+        """The fallback matches substrings, the closest match first."""
+
+        backend = IContainsSearch()
+        queryset = User.objects.all()
+
+        self.assertEqual(
+            list(backend.search(queryset, "smith")), [self.john, self.anna]
+        )
+        self.assertEqual(
+            list(backend.search(queryset, str(self.jane.uuid))), [self.jane]
+        )
+
+    def test_sqlite_fts(self):
+        """The FTS index follows the user changes."""
+
+        if not has_fts5(connection):
+            self.skipTest("SQLite is built without FTS5")
+
+        backend = SQLiteFTSSearch()
+        queryset = User.objects.all()
+
+        self.assertEqual(list(backend.search(queryset, "smi")), [self.john])
+
+        self.john.last_name = "Doe"
+        self.john.email = "john@example.com"
+        self.john.save()
+        self.assertEqual(list(backend.search(queryset, "smi")), [])
+        self.assertEqual(list(backend.search(queryset, "jo do")), [self.john])
+
+        self.john.delete()
+        self.assertEqual(list(backend.search(queryset, "doe")), [])
+
+    def test_sqlite_fts_fallback(self):
+        """Without the FTS index, the backend matches substrings."""
+
+        backend = SQLiteFTSSearch()
+        queryset = User.objects.all()
+
+        with mock.patch("cotidia.account.search.has_fts_index", return_value=False):
+            self.assertEqual(
+                list(backend.search(queryset, "smith")), [self.john, self.anna]
+            )
+
+    def test_fts_index_checked_once(self):
+        has_fts_index(connection)
+        with self.assertNumQueries(0):
+            has_fts_index(connection)
@@ -0,0 +1,110 @@
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_otp import devices_for_user
+from django_otp.plugins.otp_static.models import StaticDevice
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from cotidia.account import fixtures
+from cotidia.account.models import User, OutboxEmail
+
+
+class UserBulkActionTests(TestCase):
+
+    @fixtures.superuser
+    @fixtures.admin_user
+    @fixtures.normal_user
+    @fixtures.alt_user
+    def setUp(self):
+        self.url = reverse("account-admin:user-bulk-action")
+        self.group = Group.objects.create(name="Customers")
+        for codename in ["change_user", "delete_user"]:
+            self.admin_user.user_permissions.add(
+                Permission.objects.get(codename=codename)
+            )
+
+    def post(self, url=None, **data):
+        response = self.client.post(url or self.url, data)
+        self.assertEqual(response.status_code, 302)
+        return response
+
+    def test_deactivate_and_activate(self):
+        self.client.force_login(self.superuser)
+
+        self.post(action="deactivate", confirm="on")
+        self.assertEqual(
+            set(User.objects.filter(is_active=False)),
+            {self.normal_user, self.alt_user},
+        )
+
+        self.post(action="activate", users=[str(self.alt_user.uuid)])
+        self.assertEqual(set(User.objects.filter(is_active=False)), {self.normal_user})
+
+    def test_confirm_required(self):
+        """Destructive actions need a selection or the confirmation."""
+
+        self.client.force_login(self.superuser)
+        for action in ["deactivate", "reset_two_factor", "delete"]:
+            self.post(action=action)
+        self.assertEqual(User.objects.filter(is_active=True).count(), 4)
+
+    def test_rules_enforced(self):
+        """Staff users only change the users they may manage."""
+
+        self.client.force_login(self.admin_user)
+        self.post(
+            reverse("account-admin:user-bulk-action"),
+            action="delete",
+            users=[str(self.normal_user.uuid), str(self.superuser.uuid)],
+        )
+        self.assertFalse(User.objects.filter(pk=self.normal_user.pk).exists())
+        self.assertTrue(User.objects.filter(pk=self.superuser.pk).exists())
+
+        # Staff users can't change the roles
+        self.post(action="add_group", group=self.group.pk)
+        self.assertFalse(self.group.user_set.exists())
+
+    def test_groups(self):
+        self.client.force_login(self.superuser)
+        self.normal_user.groups.add(self.group)
+
+        self.post(action="add_group", group=self.group.pk)
+        self.assertEqual(
+            set(self.group.user_set.all()), {self.normal_user, self.alt_user}
+        )
+
+        self.post(action="remove_group", group=self.group.pk)
+        self.assertFalse(self.group.user_set.exists())
+
+    def test_reset_two_factor(self):
+        for user in [self.superuser, self.admin_user]:
+            TOTPDevice.objects.create(user=user, name="default")
+            StaticDevice.objects.create(user=user, name="backup")
+
+        self.client.force_login(self.superuser)
+        self.post(
+            reverse("account-admin:user-bulk-action-superuser"),
+            action="reset_two_factor",
+            confirm="on",
+        )
+        self.post(
+            reverse("account-admin:user-bulk-action-staff"),
+            action="reset_two_factor",
+            confirm="on",
+        )
+        self.assertFalse(list(devices_for_user(self.admin_user)))
+        # The current user is excluded
+        self.assertEqual(len(list(devices_for_user(self.superuser))), 2)
+
+    @override_settings(ACCOUNT_EMAIL_OUTBOX=True)
+    def test_invite(self):
+        """The invitations are queued at once."""
+
+        User.objects.filter(
+            pk__in=[self.normal_user.pk, self.alt_user.pk]
+        ).update(password="")
+        self.client.force_login(self.superuser)
+
+        self.post(action="invite")
+        self.assertEqual(OutboxEmail.objects.count(), 2)
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from cotidia.account import fixtures
+
+
+class UserExportTests(TestCase):
+
+    @fixtures.superuser
+    @fixtures.admin_user
+    @fixtures.normal_user
+    @fixtures.alt_user
+    def setUp(self):
+        self.url = reverse("account-admin:user-export")
+
+    def get_rows(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode("utf-8")
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_csv(self):
+        self.client.force_login(self.superuser)
+
+        rows = self.get_rows(self.url)
+        self.assertEqual(
+            [row["email"] for row in rows],
+            [self.normal_user.email, self.alt_user.email],
+        )
+        self.assertEqual(rows[0]["uuid"], str(self.normal_user.uuid))
+        self.assertEqual(rows[0]["is_active"], "True")
+
+        rows = self.get_rows(reverse("account-admin:user-export-staff"))
+        self.assertEqual([row["email"] for row in rows], [self.admin_user.email])
+
+    def test_search(self):
+        self.client.force_login(self.superuser)
+
+        rows = self.get_rows(self.url, first_name="Bob")
+        self.assertEqual([row["email"] for row in rows], [self.normal_user.email])
+
+    def test_ndjson(self):
+        self.client.force_login(self.superuser)
+
+        response = self.client.get(self.url, {"format": "ndjson"})
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(
+            [json.loads(line)["email"] for line in lines],
+            [self.normal_user.email, self.alt_user.email],
+        )
+
+        response = self.client.get(self.url, {"format": "xml"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_permissions(self):
+        self.client.force_login(self.normal_user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+        # Only superusers can export the staff and superusers
+        self.client.force_login(self.admin_user)
+        for name in [
+            "account-admin:user-export-staff",
+            "account-admin:user-export-superuser",
+        ]:
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 403)
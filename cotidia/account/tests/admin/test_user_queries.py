@@ -0,0 +1,79 @@
+import re
+
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cotidia.account import fixtures
+from cotidia.account.factory import UserFactory
+
+
+class UserAdminQueryTests(TestCase):
+    """The admin user views must fetch the target user only once."""
+
+    @fixtures.superuser
+    def setUp(self):
+        self.client.login(
+            username=self.superuser.email,
+            password=self.superuser_pwd
+        )
+        self.user = UserFactory.create(
+            first_name="Normal",
+            last_name="User",
+            email="normal@user.com",
+            username="normal@user.com",
+            is_active=True,
+            is_staff=False,
+            is_superuser=False
+        )
+
+    def assertUserFetchedOnce(self, method, url_name, data=None):
+        url = reverse(url_name, kwargs={"pk": self.user.pk})
+        pattern = re.compile(
+            r'^SELECT .* FROM "account_user".* WHERE "account_user"."id" = {}\b'.format(
+                self.user.pk
+            )
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data or {})
+
+        self.assertIn(response.status_code, [200, 302])
+        queries = [
+            q["sql"] for q in context.captured_queries if pattern.match(q["sql"])
+        ]
+        self.assertEqual(len(queries), 1, queries)
+
+    def test_detail(self):
+        self.assertUserFetchedOnce("get", "account-admin:user-detail")
+
+    def test_update(self):
+        self.assertUserFetchedOnce("get", "account-admin:user-update")
+        self.assertUserFetchedOnce(
+            "post",
+            "account-admin:user-update",
+            {
+                "first_name": "Jack",
+                "last_name": "Red",
+                "email": "jack@red.com",
+                "username": "jack@red.com",
+                "is_active": True,
+            },
+        )
+
+    def test_invite(self):
+        self.assertUserFetchedOnce("get", "account-admin:user-invite")
+        self.assertUserFetchedOnce("post", "account-admin:user-invite")
+
+    def test_delete(self):
+        self.assertUserFetchedOnce("get", "account-admin:user-delete")
+        self.assertUserFetchedOnce("post", "account-admin:user-delete")
+
+    def test_change_password(self):
+        self.assertUserFetchedOnce("get", "account-admin:user-change-password")
+        self.assertUserFetchedOnce(
+            "post",
+            "account-admin:user-change-password",
+            {"password1": "demo1234", "password2": "demo1234"},
+        )
@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from cotidia.account import fixtures
+from cotidia.account.authentication import CachedTokenAuthentication
+from cotidia.account.cache import get_cache
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    @fixtures.normal_user
+    def setUp(self):
+        get_cache().clear()
+        self.authentication = CachedTokenAuthentication()
+        self.key = self.normal_user_token.key
+
+    def test_cached_token(self):
+        """A cached token is resolved without any query."""
+
+        user, token = self.authentication.authenticate_credentials(self.key)
+        self.assertEqual(user, self.normal_user)
+
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate_credentials(self.key)
+        self.assertEqual(user, self.normal_user)
+        self.assertEqual(token.key, self.key)
+
+    def test_user_save_invalidates_token(self):
+        """Deactivating the user must be applied straight away."""
+
+        self.authentication.authenticate_credentials(self.key)
+
+        self.normal_user.is_active = False
+        self.normal_user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.key)
+
+    def test_token_delete_invalidates_token(self):
+        self.authentication.authenticate_credentials(self.key)
+
+        self.normal_user_token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.key)
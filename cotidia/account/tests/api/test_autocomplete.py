@@ -0,0 +1,65 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from cotidia.account import fixtures
+
+
+class UserAutocompleteAPITests(APITestCase):
+
+    @fixtures.admin_user
+    @fixtures.normal_user
+    @fixtures.alt_user
+    def setUp(self):
+        self.url = reverse("account-api:user-autocomplete")
+        self.client.force_authenticate(self.admin_user)
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_prefix_match(self):
+        """Every word of the query must prefix a word of the user."""
+
+        data = self.search(q="b")
+        self.assertEqual(
+            [user["email"] for user in data["results"]],
+            ["bob@brown.com", "john@blue.com"],
+        )
+
+        data = self.search(q="Jo BL")
+        self.assertEqual(data["results"][0]["uuid"], str(self.admin_user.uuid))
+        self.assertEqual(data["results"][0]["name"], "John Blue")
+        self.assertEqual(len(data["results"]), 1)
+
+        data = self.search(q="al@exa")
+        self.assertEqual(data["results"][0]["email"], "al@example.com")
+
+    def test_tokens_follow_changes(self):
+        """Renaming a user updates the tokens."""
+
+        self.normal_user.last_name = "Green"
+        self.normal_user.save()
+
+        self.assertEqual(self.search(q="brown")["results"], [])
+        self.assertEqual(len(self.search(q="bob gr")["results"]), 1)
+
+    @override_settings(ACCOUNT_AUTOCOMPLETE_PAGE_SIZE=1)
+    def test_cursor(self):
+        """The pages are linked by cursors."""
+
+        first = self.search(q="b")
+        self.assertEqual(first["results"][0]["email"], "bob@brown.com")
+        self.assertIsNone(first["previous"])
+
+        second = self.search(q="b", cursor=first["next"])
+        self.assertEqual(second["results"][0]["email"], "john@blue.com")
+        self.assertIsNone(second["next"])
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.normal_user)
+        response = self.client.get(self.url, {"q": "b"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,87 @@
+from django.urls import reverse
+
+from django_otp.oath import TOTP
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from cotidia.account import fixtures
+from cotidia.account.cache import get_cache
+from cotidia.account.otp import get_backup_tokens
+
+
+class BackupTokensAPITests(APITestCase):
+
+    @fixtures.admin_user
+    def setUp(self):
+        get_cache().clear()
+        self.url = reverse("account-api:backup-tokens")
+        self.client.force_authenticate(self.admin_user)
+
+    def test_two_factor_disabled(self):
+        response = self.client.post(
+            self.url, {"password": self.admin_user_pwd}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "TWO_FACTOR_DISABLED")
+
+    def current_token(self, device):
+        return TOTP(device.bin_key, device.step, device.t0, device.digits).token()
+
+    def test_second_factor_required(self):
+        """The password alone doesn't regenerate the tokens."""
+
+        device = TOTPDevice.objects.create(user=self.admin_user, name="default")
+
+        response = self.client.post(
+            self.url, {"password": self.admin_user_pwd}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("otp_token", response.data)
+
+        response = self.client.post(
+            self.url,
+            {"password": self.admin_user_pwd, "otp_token": "123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_backup_tokens(self.admin_user), [])
+
+        # A token is only accepted once
+        data = {
+            "password": self.admin_user_pwd,
+            "otp_token": self.current_token(device),
+        }
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_regenerate(self):
+        device = TOTPDevice.objects.create(user=self.admin_user, name="default")
+
+        response = self.client.post(
+            self.url,
+            {"password": "wrong", "otp_token": self.current_token(device)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(ACCOUNT_BACKUP_TOKEN_COUNT=5):
+            response = self.client.post(
+                self.url,
+                {
+                    "password": self.admin_user_pwd,
+                    "otp_token": self.current_token(device),
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["tokens"]), 5)
+        self.assertCountEqual(
+            get_backup_tokens(self.admin_user), response.data["tokens"]
+        )
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, {"count": 5})
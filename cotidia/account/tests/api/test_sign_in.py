@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.hashers import check_password, make_password
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from cotidia.account import fixtures
+from cotidia.account.auth import hashing_slot
+from cotidia.account.forms import EmailAuthenticationForm
+
+
+def count_selects(queries, table):
+    """Count the SELECT statements reading from a given table."""
+    return len([
+        q for q in queries
+        if q["sql"].startswith("SELECT") and 'FROM "{}"'.format(table) in q["sql"]
+    ])
+
+
+@override_settings(ACCOUNT_ENABLE_TWO_FACTOR=False)
+class SignInAPITests(APITestCase):
+
+    @fixtures.normal_user
+    def setUp(self):
+        self.url = reverse("account-api:sign-in")
+
+    def test_sign_in_hashes_password_once(self):
+        """Sign in must check the password and fetch the user only once."""
+
+        data = {
+            "email": self.normal_user.email,
+            "password": self.normal_user_pwd
+        }
+
+        with mock.patch(
+            "django.contrib.auth.base_user.check_password",
+            wraps=check_password
+        ) as hasher:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["token"], self.normal_user_token.key)
+        self.assertEqual(response.data["uuid"], str(self.normal_user.uuid))
+
+        self.assertEqual(hasher.call_count, 1)
+        self.assertEqual(count_selects(context.captured_queries, "account_user"), 1)
+        self.assertEqual(
+            count_selects(context.captured_queries, "authtoken_token"), 1
+        )
+
+    def test_sign_in_invalid_password(self):
+        """An invalid password is rejected after a single hash."""
+
+        data = {
+            "email": self.normal_user.email,
+            "password": "invalid-password"
+        }
+
+        with mock.patch(
+            "django.contrib.auth.base_user.check_password",
+            wraps=check_password
+        ) as hasher:
+            response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(hasher.call_count, 1)
+
+
+@override_settings(
+    ACCOUNT_ENABLE_TWO_FACTOR=False,
+    ACCOUNT_LOGIN_MAX_CONCURRENT_HASHES=1,
+    ACCOUNT_LOGIN_HASH_WAIT=0.01,
+    ACCOUNT_LOGIN_RETRY_AFTER=3,
+)
+class LoginCapacityTests(APITestCase):
+
+    @fixtures.normal_user
+    def setUp(self):
+        self.url = reverse("account-api:sign-in")
+        self.data = {
+            "email": self.normal_user.email,
+            "password": self.normal_user_pwd
+        }
+
+    def test_sign_in_capacity_exceeded(self):
+        """The API answers 429 when no hashing slot frees up."""
+
+        with hashing_slot():
+            response = self.client.post(self.url, self.data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "3")
+
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_form_capacity_exceeded(self):
+        form = EmailAuthenticationForm(
+            data={
+                "username": self.normal_user.email,
+                "password": self.normal_user_pwd
+            }
+        )
+        with hashing_slot():
+            self.assertFalse(form.is_valid())
+        self.assertTrue(form.has_error("__all__", "login_unavailable"))
+
+    def test_unknown_user_hashes_password(self):
+        """An unknown email costs a hash, like a known one."""
+
+        data = {"email": "unknown@example.com", "password": "password"}
+
+        with mock.patch(
+            "django.contrib.auth.base_user.make_password",
+            wraps=make_password
+        ) as hasher:
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(hasher.call_count, 1)
+
+        with self.settings(ACCOUNT_LOGIN_EQUALISE_TIMING=False):
+            with mock.patch(
+                "django.contrib.auth.base_user.make_password",
+                wraps=make_password
+            ) as hasher:
+                self.client.post(self.url, data, format="json")
+        self.assertEqual(hasher.call_count, 0)
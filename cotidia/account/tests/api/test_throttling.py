@@ -0,0 +1,85 @@
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from cotidia.account import fixtures
+from cotidia.account.cache import get_cache
+from cotidia.account.throttling import consume, get_client_ip
+
+RATES = {
+    "sign_in": {"ip": "10/m", "email": "2/m", "global": None},
+    "email": {"ip": None, "email": "1/h", "global": None},
+}
+
+
+@override_settings(ACCOUNT_THROTTLE_RATES=RATES)
+class SlidingWindowTests(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_window(self):
+        self.assertIsNone(consume("sign_in", "1.2.3.4", "a@b.com", now=0))
+        self.assertIsNone(consume("sign_in", "1.2.3.4", "a@b.com", now=0))
+        # Half of the next minute has to pass for the window to hold 1 request
+        self.assertEqual(consume("sign_in", "1.2.3.4", "a@b.com", now=0), 90)
+
+        # The windows are per email address
+        self.assertIsNone(consume("sign_in", "1.2.3.4", "c@d.com", now=0))
+
+        # The rejected request wasn't counted
+        self.assertIsNone(consume("sign_in", "1.2.3.4", "A@B.com", now=90))
+        self.assertEqual(consume("sign_in", "1.2.3.4", "a@b.com", now=90), 30)
+
+    def test_zero_rate(self):
+        """A rate of zero requests rejects them all."""
+
+        rates = {"sign_up": {"ip": "0/m", "email": None, "global": None}}
+        with self.settings(ACCOUNT_THROTTLE_RATES=rates):
+            self.assertEqual(consume("sign_up", "1.2.3.4", now=15), 45)
+
+
+class ClientIPTests(TestCase):
+
+    def test_proxies(self):
+        """The address is resolved as for the Django REST framework throttles."""
+
+        request = RequestFactory().get(
+            "/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4, 10.0.0.2"
+        )
+        with self.settings(REST_FRAMEWORK={"NUM_PROXIES": 0}):
+            self.assertEqual(get_client_ip(request), "10.0.0.1")
+        with self.settings(REST_FRAMEWORK={"NUM_PROXIES": 2}):
+            self.assertEqual(get_client_ip(request), "1.2.3.4")
+
+
+@override_settings(ACCOUNT_ENABLE_THROTTLING=True, ACCOUNT_THROTTLE_RATES=RATES)
+class ThrottlingAPITests(APITestCase):
+
+    @fixtures.normal_user
+    def setUp(self):
+        get_cache().clear()
+
+    def test_sign_in(self):
+        url = reverse("account-api:sign-in")
+        data = {"email": self.normal_user.email, "password": "invalid-password"}
+
+        for n in range(2):
+            response = self.client.post(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+    def test_reset_password(self):
+        url = reverse("account-api:reset-password")
+        data = {"email": self.normal_user.email}
+
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
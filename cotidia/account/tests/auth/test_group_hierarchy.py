@@ -0,0 +1,78 @@
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase
+
+from cotidia.account import fixtures
+from cotidia.account.models import User, GroupParent, GroupClosure
+
+
+class GroupHierarchyTests(TestCase):
+
+    @fixtures.admin_user
+    def setUp(self):
+        self.viewer = Group.objects.create(name="Viewer")
+        self.editor = Group.objects.create(name="Editor")
+        self.manager = Group.objects.create(name="Manager")
+
+        self.viewer.permissions.add(Permission.objects.get(codename="view_user"))
+        self.editor.permissions.add(Permission.objects.get(codename="change_user"))
+
+        # Manager inherits from Editor, which inherits from Viewer
+        GroupParent.objects.create(parent=self.viewer, child=self.editor)
+        GroupParent.objects.create(parent=self.editor, child=self.manager)
+
+        self.admin_user.groups.add(self.manager)
+
+    def perms(self):
+        user = User.objects.get(pk=self.admin_user.pk)
+        return user.get_group_permissions()
+
+    def paths(self, ancestor, descendant):
+        row = GroupClosure.objects.filter(
+            ancestor=ancestor, descendant=descendant
+        ).first()
+        return row.paths if row else 0
+
+    def test_inherited_permissions(self):
+        """The permissions of every ancestor are resolved in one query."""
+
+        user = User.objects.get(pk=self.admin_user.pk)
+        with self.assertNumQueries(1):
+            perms = user.get_group_permissions()
+        self.assertEqual(perms, {"account.view_user", "account.change_user"})
+
+    def test_without_closure(self):
+        """The direct groups don't need their closure rows."""
+
+        GroupClosure.objects.filter(descendant=self.manager).delete()
+        self.manager.permissions.add(Permission.objects.get(codename="add_user"))
+        self.assertEqual(self.perms(), {"account.add_user"})
+
+    def test_remove_edge(self):
+        GroupParent.objects.get(parent=self.viewer, child=self.editor).delete()
+
+        self.assertEqual(self.paths(self.viewer, self.manager), 0)
+        self.assertEqual(self.perms(), {"account.change_user"})
+
+    def test_diamond(self):
+        """A second path to an ancestor is counted."""
+
+        GroupParent.objects.create(parent=self.viewer, child=self.manager)
+        self.assertEqual(self.paths(self.viewer, self.manager), 2)
+
+        GroupParent.objects.get(parent=self.viewer, child=self.editor).delete()
+        self.assertEqual(self.paths(self.viewer, self.manager), 1)
+        self.assertIn("account.view_user", self.perms())
+
+    def test_delete_group(self):
+        self.editor.delete()
+
+        self.assertEqual(self.paths(self.viewer, self.manager), 0)
+        self.assertEqual(self.perms(), set())
+
+    def test_cycle(self):
+        self.assertTrue(
+            GroupClosure.objects.would_cycle(self.manager.pk, self.viewer.pk)
+        )
+        self.assertFalse(
+            GroupClosure.objects.would_cycle(self.viewer.pk, self.manager.pk)
+        )
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase
+
+from cotidia.account import fixtures
+from cotidia.account.models import User, ObjectPermission
+
+
+class ObjectPermissionTests(TestCase):
+
+    @fixtures.superuser
+    @fixtures.admin_user
+    @fixtures.normal_user
+    @fixtures.alt_user
+    def setUp(self):
+        self.other_staff = User.objects.create(
+            username="staff@example.com",
+            email="staff@example.com",
+            is_active=True,
+            is_staff=True,
+        )
+
+    def fresh(self, user):
+        return User.objects.get(pk=user.pk)
+
+    def test_grant_to_user(self):
+        """A grant allows the permission on that object only."""
+
+        self.assertFalse(
+            self.admin_user.has_perm("account.change_user", self.other_staff)
+        )
+        ObjectPermission.objects.grant(
+            "account.change_user", self.other_staff, user=self.admin_user
+        )
+
+        admin_user = self.fresh(self.admin_user)
+        self.assertTrue(admin_user.has_perm("account.change_user", self.other_staff))
+        self.assertFalse(admin_user.has_perm("account.delete_user", self.other_staff))
+        self.assertFalse(admin_user.has_perm("account.change_user", self.superuser))
+        self.assertTrue(self.other_staff.is_visible_to(admin_user))
+
+    def test_grant_to_group(self):
+        group = Group.objects.create(name="Support")
+        self.admin_user.groups.add(group)
+        ObjectPermission.objects.grant(
+            "account.change_user", self.other_staff, group=group
+        )
+
+        self.assertTrue(
+            self.fresh(self.admin_user).has_perm(
+                "account.change_user", self.other_staff
+            )
+        )
+
+    def test_visible_to(self):
+        """The rules are applied in the database."""
+
+        self.assertEqual(User.objects.visible_to(self.admin_user).count(), 0)
+        self.assertEqual(
+            User.objects.visible_to(self.superuser).count(), User.objects.count()
+        )
+
+        self.admin_user.user_permissions.add(
+            Permission.objects.get(codename="change_user")
+        )
+        ObjectPermission.objects.grant(
+            "account.change_user", self.other_staff, user=self.admin_user
+        )
+
+        admin_user = self.fresh(self.admin_user)
+        self.assertTrue(admin_user.has_perm("account.change_user"))
+
+        with self.assertNumQueries(1):
+            users = set(User.objects.visible_to(admin_user))
+        self.assertEqual(
+            users, {self.normal_user, self.alt_user, self.other_staff}
+        )
+
+    def test_user_delete_removes_grants(self):
+        ObjectPermission.objects.grant(
+            "account.change_user", self.other_staff, user=self.admin_user
+        )
+        self.other_staff.delete()
+        self.assertFalse(ObjectPermission.objects.exists())
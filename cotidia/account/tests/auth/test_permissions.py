@@ -0,0 +1,53 @@
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase, override_settings
+
+from cotidia.account import fixtures
+from cotidia.account.cache import get_cache
+from cotidia.account.models import User
+
+
+@override_settings(ACCOUNT_CACHE_PERMISSIONS=True)
+class PermissionCacheTests(TestCase):
+
+    @fixtures.admin_user
+    def setUp(self):
+        get_cache().clear()
+        self.group = Group.objects.create(name="Editors")
+        self.change_user = Permission.objects.get(codename="change_user")
+        self.delete_user = Permission.objects.get(codename="delete_user")
+        self.group.permissions.add(self.change_user)
+        self.admin_user.groups.add(self.group)
+
+    def fresh_user(self):
+        """Load the user again, as a new request would."""
+        return User.objects.get(pk=self.admin_user.pk)
+
+    def test_cached_across_requests(self):
+        self.assertTrue(self.fresh_user().has_perm("account.change_user"))
+
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("account.change_user"))
+            self.assertFalse(user.has_perm("account.delete_user"))
+
+    def test_group_permissions_change(self):
+        self.assertFalse(self.fresh_user().has_perm("account.delete_user"))
+
+        self.group.permissions.add(self.delete_user)
+        self.assertTrue(self.fresh_user().has_perm("account.delete_user"))
+
+        self.group.delete()
+        self.assertFalse(self.fresh_user().has_perm("account.change_user"))
+
+    def test_user_changes(self):
+        self.assertTrue(self.fresh_user().has_perm("account.change_user"))
+
+        self.admin_user.groups.remove(self.group)
+        self.assertFalse(self.fresh_user().has_perm("account.change_user"))
+
+        self.admin_user.user_permissions.add(self.delete_user)
+        self.assertTrue(self.fresh_user().has_perm("account.delete_user"))
+
+        self.admin_user.is_active = False
+        self.admin_user.save()
+        self.assertFalse(self.fresh_user().has_perm("account.delete_user"))
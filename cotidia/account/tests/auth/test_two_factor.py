@@ -0,0 +1,166 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_otp.oath import TOTP
+from django_otp.plugins.otp_totp.models import TOTPDevice
+from two_factor.models import PhoneDevice
+
+from cotidia.account import fixtures
+from cotidia.account.cache import get_cache
+from cotidia.account.forms import DeviceValidationForm
+from cotidia.account.models import User
+from cotidia.account.otp import (
+    DEVICE_ID_SESSION_KEY,
+    is_session_verified,
+    remember_verified,
+)
+
+
+class TwoFactorStateTests(TestCase):
+
+    @fixtures.admin_user
+    def setUp(self):
+        get_cache().clear()
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.admin_user.pk)
+
+    @override_settings(ACCOUNT_CACHE_BACKEND="default")
+    def test_two_factor_auth_enabled_cached(self):
+        get_cache().clear()
+        self.assertFalse(self.fresh_user().two_factor_auth_enabled)
+
+        TOTPDevice.objects.create(user=self.admin_user, name="default")
+        user = self.fresh_user()
+        self.assertTrue(user.two_factor_auth_enabled)
+
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.two_factor_auth_enabled)
+
+        TOTPDevice.objects.filter(user=self.admin_user).get().delete()
+        self.assertFalse(self.fresh_user().two_factor_auth_enabled)
+
+    def test_two_factor_auth_enabled_uncached(self):
+        """The in-process cache isn't used for the default device."""
+
+        TOTPDevice.objects.create(user=self.admin_user, name="default")
+        user = self.fresh_user()
+
+        with mock.patch("cotidia.account.otp.get_cache") as get_cache:
+            self.assertTrue(user.two_factor_auth_enabled)
+        get_cache.assert_not_called()
+
+        # Memoised on the user
+        with self.assertNumQueries(0):
+            self.assertTrue(user.two_factor_auth_enabled)
+
+    @override_settings(ACCOUNT_CACHE_BACKEND="default")
+    def test_session_state_invalidated(self):
+        device = TOTPDevice.objects.create(user=self.admin_user, name="default")
+        session = {DEVICE_ID_SESSION_KEY: device.persistent_id}
+
+        remember_verified(session, self.admin_user.pk)
+        self.assertTrue(is_session_verified(session, self.admin_user.pk))
+
+        device.delete()
+        self.assertFalse(is_session_verified(session, self.admin_user.pk))
+
+    def test_session_state_requires_shared_cache(self):
+        """The in-process cache doesn't see the other processes changes."""
+
+        device = TOTPDevice.objects.create(user=self.admin_user, name="default")
+        session = {DEVICE_ID_SESSION_KEY: device.persistent_id}
+
+        remember_verified(session, self.admin_user.pk)
+        self.assertFalse(is_session_verified(session, self.admin_user.pk))
+
+
+class OTPGuardTests(TestCase):
+
+    @fixtures.admin_user
+    def setUp(self):
+        get_cache().clear()
+        self.device = TOTPDevice.objects.create(user=self.admin_user, name="default")
+
+    def current_token(self):
+        device = self.device
+        return TOTP(device.bin_key, device.step, device.t0, device.digits).token()
+
+    def validate(self, token):
+        form = DeviceValidationForm(self.device, data={"token": token})
+        form.is_valid()
+        return form
+
+    def test_replayed_token(self):
+        token = self.current_token()
+        self.assertTrue(self.validate(token).is_valid())
+
+        with self.assertNumQueries(0):
+            form = self.validate(token)
+        self.assertTrue(form.has_error("token", "replayed"))
+
+    @override_settings(ACCOUNT_OTP_MAX_ATTEMPTS=2)
+    def test_throttled(self):
+        for n in range(2):
+            self.assertFalse(self.validate(1).is_valid())
+
+        with self.assertNumQueries(0):
+            form = self.validate(self.current_token())
+        self.assertTrue(form.has_error("token", "throttled"))
+
+
+@override_settings(TWO_FACTOR_SMS_GATEWAY="two_factor.gateways.fake.Fake")
+class PhoneSetupTests(TestCase):
+    """The token steps of the wizards are only validated once."""
+
+    number = "+31101234567"
+
+    @fixtures.admin_user
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_login(self.admin_user)
+
+    def post(self, url, prefix, step, **data):
+        data = {"{}-{}".format(step, name): value for name, value in data.items()}
+        data["{}-current_step".format(prefix)] = step
+        return self.client.post(url, data)
+
+    @mock.patch("two_factor.gateways.fake.Fake.send_sms")
+    def test_sms_setup(self, send_sms):
+        url = reverse("account-admin:setup")
+        self.post(url, "setup_view", "welcome")
+        self.post(url, "setup_view", "method", method="sms")
+        self.post(url, "setup_view", "sms", number=self.number)
+        token = send_sms.call_args[1]["token"]
+
+        response = self.post(url, "setup_view", "validation", token=token)
+        self.assertRedirects(
+            response,
+            reverse("account-admin:setup_complete"),
+            fetch_redirect_response=False,
+        )
+        self.assertTrue(
+            PhoneDevice.objects.filter(user=self.admin_user, name="default").exists()
+        )
+
+    @mock.patch("two_factor.gateways.fake.Fake.send_sms")
+    def test_phone_setup(self, send_sms):
+        device = TOTPDevice.objects.create(user=self.admin_user, name="default")
+        session = self.client.session
+        session[DEVICE_ID_SESSION_KEY] = device.persistent_id
+        session.save()
+
+        url = reverse("account-admin:phone_create")
+        self.post(url, "phone_setup_view", "setup", number=self.number, method="sms")
+        token = send_sms.call_args[1]["token"]
+
+        response = self.post(url, "phone_setup_view", "validation", token=token)
+        self.assertRedirects(
+            response, reverse("account-admin:profile"), fetch_redirect_response=False
+        )
+        self.assertTrue(
+            PhoneDevice.objects.filter(user=self.admin_user, name="backup").exists()
+        )
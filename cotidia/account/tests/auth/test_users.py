@@ -0,0 +1,104 @@
+import uuid
+
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from cotidia.account import fixtures
+from cotidia.account.auth import EmailBackend
+from cotidia.account.cache import get_cache
+from cotidia.account.models import User
+from cotidia.account.shortcuts import get_user_or_404
+
+
+class UserLookupTests(TestCase):
+
+    @fixtures.normal_user
+    def setUp(self):
+        pass
+
+    def test_get_by_uuid(self):
+        for value in [self.normal_user.uuid, str(self.normal_user.uuid)]:
+            self.assertEqual(User.objects.get_by_uuid(value), self.normal_user)
+
+        for value in [uuid.uuid4(), "not-a-uuid", "", None]:
+            with self.assertRaises(User.DoesNotExist):
+                User.objects.get_by_uuid(value)
+
+    def test_get_user_or_404(self):
+        self.assertEqual(get_user_or_404(str(self.normal_user.uuid)), self.normal_user)
+
+        for value in [str(uuid.uuid4()), "not-a-uuid"]:
+            with self.assertRaises(Http404):
+                get_user_or_404(value)
+
+
+@override_settings(ACCOUNT_CACHE_USERS=True)
+class UserCacheTests(TestCase):
+
+    @fixtures.normal_user
+    def setUp(self):
+        get_cache().clear()
+        self.backend = EmailBackend()
+
+    def test_cache_hit(self):
+        self.assertEqual(self.backend.get_user(self.normal_user.pk), self.normal_user)
+
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.normal_user.pk)
+        self.assertEqual(user, self.normal_user)
+
+    def test_invalidated_on_save(self):
+        self.backend.get_user(self.normal_user.pk)
+
+        self.normal_user.first_name = "Changed"
+        self.normal_user.save()
+
+        user = self.backend.get_user(self.normal_user.pk)
+        self.assertEqual(user.first_name, "Changed")
+
+    def test_invalidated_on_delete(self):
+        self.backend.get_user(self.normal_user.pk)
+
+        pk = self.normal_user.pk
+        self.normal_user.delete()
+
+        self.assertIsNone(self.backend.get_user(pk))
+
+
+class LoginUserTests(TestCase):
+
+    @fixtures.normal_user
+    @fixtures.alt_user
+    def setUp(self):
+        self.backend = EmailBackend()
+
+    def test_case_insensitive_email(self):
+        self.assertEqual(
+            self.backend.get_login_user(self.normal_user.email.upper()),
+            self.normal_user,
+        )
+
+    def test_email_over_username(self):
+        # Another user's username is the email of the normal user
+        self.normal_user.username = "bob"
+        self.normal_user.save()
+        self.alt_user.username = self.normal_user.email
+        self.alt_user.save()
+
+        self.assertEqual(
+            self.backend.get_login_user(self.normal_user.email), self.normal_user
+        )
+        self.assertEqual(
+            self.backend.get_login_user(self.normal_user.email.upper()),
+            self.normal_user,
+        )
+
+    def test_username(self):
+        self.alt_user.username = "al"
+        self.alt_user.save()
+        self.assertEqual(self.backend.get_login_user("al"), self.alt_user)
+
+    def test_empty_username(self):
+        User.objects.create(username="blank", email="")
+        self.assertIsNone(self.backend.get_login_user(""))
+        self.assertIsNone(self.backend.authenticate(username="", password="x"))
@@ -0,0 +1,50 @@
+import csv
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from cotidia.account.factory import UserFactory
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.jack = UserFactory.create(
+            email="jack@example.com",
+            first_name="Jack",
+            last_name="Red",
+            is_staff=False,
+        )
+        self.jill = UserFactory.create(
+            email="jill@example.com",
+            first_name="Jill",
+            last_name="Green",
+            is_staff=True,
+        )
+
+    def export(self, **options):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        try:
+            call_command("account_export", output=path, chunk_size=1, **options)
+            with open(path, newline="", encoding="utf-8") as f:
+                return list(csv.DictReader(f))
+        finally:
+            os.remove(path)
+
+    def test_export(self):
+        rows = self.export()
+        self.assertEqual(
+            [row["email"] for row in rows], ["jack@example.com", "jill@example.com"]
+        )
+        self.assertEqual(rows[0]["first_name"], "Jack")
+        self.assertEqual(rows[1]["is_staff"], "True")
+
+    def test_filters(self):
+        rows = self.export(role="staff")
+        self.assertEqual([row["email"] for row in rows], ["jill@example.com"])
+
+        rows = self.export(search="jack")
+        self.assertEqual([row["email"] for row in rows], ["jack@example.com"])
@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from rest_framework.authtoken.models import Token
+
+from cotidia.account.factory import UserFactory
+from cotidia.account.models import User
+
+
+class ImportTests(TestCase):
+
+    def setUp(self):
+        UserFactory.create(email="Existing@Example.com", username="existing")
+
+    def test_bulk_create_users(self):
+        rows = [
+            {"email": "Jack@Example.com", "password": "demo1234",
+             "first_name": "Jack", "last_name": "Red"},
+            {"email": "jill@example.com", "password": "", "is_active": "false"},
+            {"email": "not-an-email", "password": "demo1234"},
+            {"email": "jack@example.com", "password": "demo1234"},
+            {"email": "existing@example.com", "password": "demo1234"},
+        ]
+        rejected = []
+
+        created = User.objects.bulk_create_users(
+            rows,
+            chunk_size=2,
+            workers=1,
+            on_reject=lambda row, reason: rejected.append(row["email"]),
+        )
+
+        self.assertEqual(created, 2)
+        self.assertEqual(
+            rejected, ["not-an-email", "jack@example.com", "existing@example.com"]
+        )
+
+        jack = User.objects.get(email="jack@example.com")
+        self.assertTrue(jack.check_password("demo1234"))
+        self.assertTrue(jack.is_active)
+        self.assertEqual(jack.first_name, "Jack")
+
+        jill = User.objects.get(email="jill@example.com")
+        self.assertFalse(jill.has_usable_password())
+        self.assertFalse(jill.is_active)
+
+        self.assertEqual(Token.objects.filter(user__in=[jack, jill]).count(), 2)
+
+    def test_import_command(self):
+        handle, path = tempfile.mkstemp(suffix=".ndjson")
+        with os.fdopen(handle, "w") as f:
+            f.write('{"email": "jack@example.com", "password": "demo1234"}\n')
+            f.write("not json\n")
+
+        try:
+            call_command(
+                "account_import", path, workers=1, stdout=StringIO(), stderr=StringIO()
+            )
+        finally:
+            os.remove(path)
+
+        self.assertTrue(User.objects.filter(email="jack@example.com").exists())
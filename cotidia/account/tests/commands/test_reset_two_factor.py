@@ -0,0 +1,31 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from django_otp import devices_for_user
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from cotidia.account.factory import UserFactory
+
+
+class ResetTwoFactorTests(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory.create(email="Jack@Example.com")
+        TOTPDevice.objects.create(user=self.user, name="default")
+
+    def test_reset(self):
+        """The emails are matched case-insensitively."""
+
+        out = StringIO()
+        call_command("account_reset_two_factor", "jack@example.com", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "1 user(s) reset.")
+        self.assertFalse(list(devices_for_user(self.user)))
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "account_reset_two_factor", "jack@example.com", "jill@example.com"
+            )
+        self.assertTrue(list(devices_for_user(self.user)))
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from cotidia.account.factory import UserFactory
+from cotidia.account.models import OutboxEmail
+from cotidia.account.outbox import process_batch
+
+
+@override_settings(ACCOUNT_EMAIL_OUTBOX=True)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory.create(
+            first_name="Bob",
+            last_name="Brown",
+            email="bob@brown.com",
+            username="bob@brown.com",
+            is_active=False,
+        )
+
+    def test_notice_is_queued(self):
+        """The email is queued and only sent by the outbox worker."""
+
+        self.user.send_activation_link()
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+
+        sent, failed = process_batch(workers=1)
+        self.assertEqual((sent, failed), (1, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Account activation")
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(email.attempts, 1)
+
+        # Nothing left to send
+        self.assertEqual(process_batch(workers=1), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(ACCOUNT_EMAIL_OUTBOX_MAX_ATTEMPTS=1)
+    def test_failed_notice(self):
+        """A failing email is kept with its error."""
+
+        self.user.send_activation_link()
+
+        with mock.patch(
+            "cotidia.account.notices.NewUserActivationNotice.send",
+            side_effect=Exception("SMTP unavailable")
+        ):
+            sent, failed = process_batch(workers=1)
+        self.assertEqual((sent, failed), (0, 1))
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+        self.assertIn("SMTP unavailable", email.last_error)
+        self.assertEqual(len(mail.outbox), 0)
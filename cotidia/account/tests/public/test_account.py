@@ -8,6 +8,7 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
+from cotidia.account.auth import hashing_slot
 from cotidia.account.conf import settings
 from cotidia.account.factory import UserFactory
 
@@ -45,6 +46,25 @@ class AccountPublicTests(TestCase):
         # Should not redirect as not allowed to login
         self.assertEquals(response.status_code, 200)
 
+    @override_settings(
+        ACCOUNT_FORCE_ACTIVATION=False,
+        ACCOUNT_LOGIN_MAX_CONCURRENT_HASHES=1,
+        ACCOUNT_LOGIN_HASH_WAIT=0.01,
+    )
+    def test_signup_login_without_hashing_slot(self):
+        """The new user is logged in without hashing the password again."""
+
+        data = {
+            "email": "test@test.com",
+            "password1": "demo123",
+            "password2": "demo123",
+        }
+        with hashing_slot():
+            response = self.client.post(reverse("account-public:sign-up"), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("_auth_user_id", self.client.session)
+        self.assertEqual(len(mail.outbox), 1)
+
     def test_signup_and_confirm_with_email(self):
 
         data = {
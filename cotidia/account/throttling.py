@@ -0,0 +1,200 @@
+"""
+Sliding window throttles for the sign in, sign up and email sending views.
+
+Each scope of `ACCOUNT_THROTTLE_RATES` has up to three windows: one per client
+IP address, one per email address (or user UUID) and one shared by every
+client. A window counts the requests of the current period and of the previous
+one, and estimates the requests of the last period by weighting the previous
+count with the part of it still in the sliding window. A request is counted in
+each window, and is rejected, and uncounted, if one of them goes over its rate.
+A rate of zero requests rejects every request.
+
+The counters are stored in the account cache and changed with `incr()` and
+`decr()`, which are atomic on the shared backends, so concurrent requests
+can't all pass a window that has one request left.
+
+"""
+import hashlib
+import math
+import time
+
+from functools import wraps
+
+from django.http import HttpResponse
+
+from rest_framework.throttling import BaseThrottle
+
+from cotidia.account.cache import get_cache, make_key
+from cotidia.account.conf import settings
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Return the number of requests and the period in seconds of a rate."""
+    if rate is None:
+        return None, None
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+def get_client_ip(request):
+    """
+    Return the client address as identified by the Django REST framework
+    throttles, from `X-Forwarded-For` according to its `NUM_PROXIES` setting.
+    """
+    return BaseThrottle().get_ident(request) if request is not None else None
+
+
+def get_windows(scope, ip=None, email=None):
+    """Return the cache keys and rates of the windows of a request."""
+    rates = settings.ACCOUNT_THROTTLE_RATES.get(scope, {})
+    idents = {"ip": ip, "global": "all"}
+    if email:
+        idents["email"] = hashlib.sha1(email.strip().lower().encode()).hexdigest()
+
+    windows = []
+    for kind, ident in idents.items():
+        rate = rates.get(kind)
+        if rate and ident:
+            windows.append((make_key("throttle", scope, kind, ident), rate))
+    return windows
+
+
+def get_wait(limit, period, previous, count, elapsed):
+    """
+    Return the number of seconds before a window allows one more request, with
+    `count` requests in the current period and `previous` in the previous one.
+    """
+    if limit == 0:
+        # Nothing is allowed, retry with the next period
+        return period - elapsed
+    if count + 1 <= limit:
+        # Wait for enough of the previous period to leave the window
+        return (1 - (limit - 1 - count) / previous) * period - elapsed
+    # Wait for the next period, and for enough of this one to leave the window
+    return period - elapsed + (1 - (limit - 1) / count) * period
+
+
+def consume(scope, ip=None, email=None, now=None):
+    """
+    Count a request in each window of its scope. Return `None` if the request
+    is allowed, otherwise the number of seconds to wait before retrying.
+    """
+    windows = get_windows(scope, ip, email)
+    if not windows:
+        return None
+
+    cache = get_cache()
+    now = time.time() if now is None else now
+
+    counters = []
+    for key, rate in windows:
+        limit, period = parse_rate(rate)
+        index, elapsed = divmod(now, period)
+        counters.append(
+            (
+                "{}:{}".format(key, int(index)),
+                "{}:{}".format(key, int(index) - 1),
+                limit,
+                period,
+                elapsed,
+            )
+        )
+    previous_counts = cache.get_many([counter[1] for counter in counters])
+
+    counted = []
+    waits = []
+    for current, previous, limit, period, elapsed in counters:
+        # Kept for the next period, when it is the previous one
+        cache.add(current, 0, period * 2)
+        try:
+            count = cache.incr(current)
+        except ValueError:
+            # Evicted since `add()`
+            count = 1
+            cache.set(current, count, period * 2)
+        counted.append(current)
+
+        previous = previous_counts.get(previous, 0)
+        if previous * (1 - elapsed / period) + count > limit:
+            waits.append(get_wait(limit, period, previous, count - 1, elapsed))
+
+    if not waits:
+        return None
+
+    for current in counted:
+        try:
+            cache.decr(current)
+        except ValueError:
+            pass
+    return max(waits)
+
+
+class AccountThrottle(BaseThrottle):
+    """
+    Throttle an API view with the windows of `scope`, when
+    `ACCOUNT_ENABLE_THROTTLING` is set.
+    """
+
+    scope = None
+
+    def get_email(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        return email if isinstance(email, str) else None
+
+    def allow_request(self, request, view):
+        if not settings.ACCOUNT_ENABLE_THROTTLING:
+            return True
+        self.wait_time = consume(
+            self.scope, self.get_ident(request), self.get_email(request, view)
+        )
+        return self.wait_time is None
+
+    def wait(self):
+        return self.wait_time
+
+
+class SignInThrottle(AccountThrottle):
+    scope = "sign_in"
+
+
+class SignUpThrottle(AccountThrottle):
+    scope = "sign_up"
+
+
+class EmailThrottle(AccountThrottle):
+    """Throttle the views sending an email, per email address or user UUID."""
+
+    scope = "email"
+
+    def get_email(self, request, view):
+        return super().get_email(request, view) or view.kwargs.get("uuid")
+
+
+def throttle(scope, email_field="email", methods=("POST",)):
+    """
+    Throttle a Django view with the windows of `scope`, when
+    `ACCOUNT_ENABLE_THROTTLING` is set. The email is read from the
+    `email_field` of the POST data, or the `uuid` argument of the view.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if settings.ACCOUNT_ENABLE_THROTTLING and (
+                methods is None or request.method in methods
+            ):
+                email = request.POST.get(email_field) or kwargs.get("uuid")
+                wait = consume(scope, get_client_ip(request), email and str(email))
+                if wait is not None:
+                    response = HttpResponse(
+                        "Too many requests, please try again later.", status=429
+                    )
+                    response["Retry-After"] = str(math.ceil(wait))
+                    return response
+            return view(request, *args, **kwargs)
+
+        return wrapped
+
+    return decorator
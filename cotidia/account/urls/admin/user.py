@@ -5,6 +5,12 @@ from cotidia.account.views.admin.user import (
     UserList,
     UserListStaff,
     UserListSuperuser,
+    UserExport,
+    UserExportStaff,
+    UserExportSuperuser,
+    UserBulkAction,
+    UserBulkActionStaff,
+    UserBulkActionSuperuser,
     UserCreate,
     UserDetail,
     UserUpdate,
@@ -31,6 +37,36 @@ urlpatterns = [
         UserListSuperuser.as_view(),
         name='user-list-superuser'
     ),
+    url(
+        r'^export/$',
+        UserExport.as_view(),
+        name='user-export'
+    ),
+    url(
+        r'^staff/export/$',
+        UserExportStaff.as_view(),
+        name='user-export-staff'
+    ),
+    url(
+        r'^superuser/export/$',
+        UserExportSuperuser.as_view(),
+        name='user-export-superuser'
+    ),
+    url(
+        r'^bulk/$',
+        UserBulkAction.as_view(),
+        name='user-bulk-action'
+    ),
+    url(
+        r'^staff/bulk/$',
+        UserBulkActionStaff.as_view(),
+        name='user-bulk-action-staff'
+    ),
+    url(
+        r'^superuser/bulk/$',
+        UserBulkActionSuperuser.as_view(),
+        name='user-bulk-action-superuser'
+    ),
     url(
         r'^add$',
         UserCreate.as_view(),
@@ -36,6 +36,13 @@ urlpatterns = [
     ),
     url(r"^update-details$", api.UpdateDetails.as_view(), name="update-details"),
     url(r"^change-password$", api.ChangePassword.as_view(), name="change-password"),
+    url(r"^backup-tokens$", api.BackupTokens.as_view(), name="backup-tokens"),
+    url(
+        r"^users/autocomplete$",
+        api.UserAutocomplete.as_view(),
+        name="user-autocomplete",
+    ),
+    url(r"^permissions$", api.PermissionList.as_view(), name="permission-list"),
     path(
         "dynamic-list/auth/group",
         DynamicListAPIView.as_view(permission_required=["auth.change_group"]),
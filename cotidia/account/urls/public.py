@@ -2,6 +2,7 @@ from django.conf.urls import url
 from django.urls import reverse_lazy
 from django.contrib.auth import views as auth_views
 from cotidia.account.conf import settings
+from cotidia.account.throttling import throttle
 
 from cotidia.account.forms import (
     AccountPasswordResetForm,
@@ -63,12 +64,14 @@ urlpatterns = [
     ),
     url(
         r"^password/reset/$",
-        auth_views.PasswordResetView.as_view(
-            template_name="account/password_reset_form.html",
-            success_url=reverse_lazy("account-public:password_reset_done"),
-            form_class=AccountPasswordResetForm,
-            email_template_name="account/password_reset_email.html",
-            subject_template_name="account/password_reset_subject.txt",
+        throttle("email")(
+            auth_views.PasswordResetView.as_view(
+                template_name="account/password_reset_form.html",
+                success_url=reverse_lazy("account-public:password_reset_done"),
+                form_class=AccountPasswordResetForm,
+                email_template_name="account/password_reset_email.html",
+                subject_template_name="account/password_reset_subject.txt",
+            )
         ),
         name="password_reset",
     ),
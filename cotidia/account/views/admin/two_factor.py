@@ -1,15 +1,14 @@
 from django.views.decorators.debug import sensitive_post_parameters
 from django.views.decorators.cache import never_cache
 from django.views import View
-from django.shortcuts import render, redirect, resolve_url, get_object_or_404
+from django.shortcuts import render, redirect, resolve_url
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
 from django.urls import reverse
 from django.contrib import messages
 
-from django_otp import devices_for_user, user_has_device
+from django_otp import user_has_device
 from django_otp.decorators import otp_required
-from django_otp.plugins.otp_static.models import StaticToken
 
 from two_factor.models import get_available_phone_methods
 from two_factor.views.utils import class_view_decorator
@@ -36,7 +35,14 @@ from cotidia.account.forms import (
     YubiKeyDeviceForm,
     PhoneNumberMethodForm,
 )
-from cotidia.account.models import User
+from cotidia.account.otp import (
+    invalidate_devices,
+    get_backup_tokens,
+    has_backup_tokens,
+    regenerate_backup_tokens,
+    remove_devices,
+)
+from cotidia.account.shortcuts import get_user_or_404
 
 
 @class_view_decorator(sensitive_post_parameters())
@@ -49,6 +55,13 @@ class TwoFactorLoginView(BaseLoginView):
         ("backup", BackupTokenForm),
     )
 
+    def get_form_kwargs(self, step=None):
+        kwargs = super().get_form_kwargs(step)
+        if step in ("token", "backup"):
+            # For the attempt counters per IP address
+            kwargs["request"] = self.request
+        return kwargs
+
     def get_context_data(self, form, **kwargs):
         context = super().get_context_data(form, **kwargs)
         context["next"] = self.request.GET.get("next") or reverse(
@@ -92,8 +105,7 @@ class DisableView(View):
 
         if form.is_valid():
             # Remove all the devices from the user
-            for device in devices_for_user(self.request.user):
-                device.delete()
+            remove_devices([self.request.user])
 
             return redirect(resolve_url("account-admin:edit"))
 
@@ -113,7 +125,7 @@ class UserDisableView(View):
     form_class = PasswordProtectionForm
 
     def get_user(self, uuid):
-        return get_object_or_404(User, uuid=uuid)
+        return get_user_or_404(uuid)
 
     def get(self, request, uuid, *args, **kwargs):
 
@@ -142,8 +154,7 @@ class UserDisableView(View):
             user = self.get_user(uuid)
 
             # Remove all the devices from the user
-            for device in devices_for_user(user):
-                device.delete()
+            remove_devices([user])
 
             return redirect(resolve_url("account-admin:user-detail", pk=user.id))
 
@@ -158,31 +169,21 @@ class ListBackupTokensView(View):
     form_class = PasswordProtectionForm
     template_name = "admin/account/two_factor/core/list_backup_tokens.html"
 
-    def get_device(self):
-        return self.request.user.staticdevice_set.get_or_create(name="backup")[0]
-
-    @property
-    def has_backup_tokens(self, **kwargs):
-        device = self.get_device()
-        if device.token_set.count() > 0:
-            return True
-        else:
-            return False
-
     def get(self, request, *args, **kwargs):
         form = self.form_class(user=request.user)
         return render(
             request,
             self.template_name,
-            {"form": form, "has_backup_tokens": self.has_backup_tokens},
+            {"form": form, "has_backup_tokens": has_backup_tokens(request.user)},
         )
 
     def post(self, request, *args, **kwargs):
         form = self.form_class(data=request.POST, user=request.user)
-        context = {"form": form, "has_backup_tokens": self.has_backup_tokens}
+        tokens = get_backup_tokens(request.user)
+        context = {"form": form, "has_backup_tokens": bool(tokens)}
         if form.is_valid():
-            # Add the device to the context to retrieve the list of tokens
-            context["device"] = self.get_device()
+            # Add the tokens to the context to display them
+            context["tokens"] = tokens
 
         return render(request, self.template_name, context)
 
@@ -195,15 +196,7 @@ class GenerateBackupTokensView(View):
     form_class = PasswordProtectionForm
     template_name = "admin/account/two_factor/core/generate_backup_tokens.html"
     initial = {}
-    number_of_tokens = 10
-
-    def get_device(self):
-        return self.request.user.staticdevice_set.get_or_create(name="backup")[0]
-
-    def get_context_data(self, **kwargs):
-        context = super(ListBackupTokensView, self).get_context_data(**kwargs)
-        context["device"] = self.get_device()
-        return context
+    number_of_tokens = None
 
     def get(self, request, *args, **kwargs):
         form = self.form_class(initial=self.initial, user=request.user)
@@ -213,13 +206,12 @@ class GenerateBackupTokensView(View):
         form = self.form_class(data=request.POST, user=request.user)
         context = {"form": form}
         if form.is_valid():
-            # Delete the existing tokens and generate some new ones
-            device = self.get_device()
-            device.token_set.all().delete()
-            for n in range(self.number_of_tokens):
-                device.token_set.create(token=StaticToken.random_token())
-
+            # Replace the existing tokens with new ones
+            device, tokens = regenerate_backup_tokens(
+                request.user, self.number_of_tokens
+            )
             context["device"] = device
+            context["tokens"] = tokens
 
         return render(request, self.template_name, context)
 
@@ -239,6 +231,20 @@ class SetupView(BaseSetupView):
         ("validation", DeviceValidationForm),
         ("yubikey", YubiKeyDeviceForm),
     )
+    # The token steps aren't validated again when the wizard is done, as the
+    # tokens can't be reused
+    idempotent_dict = {"validation": False, "yubikey": False}
+
+    def get_form_kwargs(self, step=None):
+        kwargs = super().get_form_kwargs(step)
+        if step in ("validation", "yubikey"):
+            kwargs["request"] = self.request
+        return kwargs
+
+    def done(self, form_list, **kwargs):
+        response = super().done(form_list, **kwargs)
+        invalidate_devices(self.request.user.pk)
+        return response
 
 
 @class_view_decorator(never_cache)
@@ -253,6 +259,13 @@ class PhoneSetupView(BasePhoneSetupView):
     success_url = "account-admin:profile"
     template_name = "admin/account/two_factor/core/phone_register.html"
     form_list = (("setup", PhoneNumberMethodForm), ("validation", DeviceValidationForm))
+    idempotent_dict = {"validation": False}
+
+    def get_form_kwargs(self, step=None):
+        kwargs = super().get_form_kwargs(step)
+        if step == "validation":
+            kwargs["request"] = self.request
+        return kwargs
 
     def get(self, request, *args, **kwargs):
         if not get_available_phone_methods():
@@ -1,11 +1,11 @@
 import django_filters
 import importlib
-import uuid
 
 from django.db.models import Q
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse, Http404
 from django.urls import reverse
 from django.contrib import messages
+from django.utils.translation import ugettext as _
 from django.core.exceptions import ObjectDoesNotExist
 from django.apps import apps
 from django import forms
@@ -20,6 +20,10 @@ from cotidia.admin.views import (
     AdminUpdateView,
     AdminDeleteView,
 )
+from cotidia.account import bulk
+from cotidia.account.export import EXPORT_FORMATS
+from cotidia.account.pagination import KeysetPaginator
+from cotidia.account.search import search_users
 from cotidia.account.models import User
 from cotidia.account.forms.admin.user import (
     UserAddForm,
@@ -28,22 +32,36 @@ from cotidia.account.forms.admin.user import (
     SuperUserUpdateForm,
     UserChangePasswordForm,
     UserInviteForm,
+    UserBulkActionForm,
 )
 
 
-class CheckUserMixin:
-    def check_user(self, user):
-        obj = self.get_object()
-        if obj.is_superuser:
-            if user.is_superuser:
-                return True
-        elif obj.is_staff:
-            if user.is_superuser:
-                return True
-        elif user.is_staff and user.has_perm("account.change_user"):
-            return True
+class UserObjectMixin:
+    """
+    Resolve the target user once per request.
+
+    The permission check, the view and its form all call `get_object()`.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if settings.ACCOUNT_PROFILE_MODEL:
+            queryset = queryset.select_related("profile")
+        return queryset
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, "_user_object"):
+            self._user_object = super().get_object()
+        return self._user_object
 
-        return False
+
+class CheckUserMixin(UserObjectMixin):
+    user_permission = "account.change_user"
+
+    def check_user(self, user):
+        return self.get_object().is_visible_to(user, self.user_permission)
 
 
 class UserFilter(django_filters.FilterSet):
@@ -58,23 +76,144 @@ class UserFilter(django_filters.FilterSet):
         fields = ["first_name"]
 
     def search(self, queryset, name, value):
+        return search_users(queryset, value)
+
+
+class UserExportMixin:
+    """Stream the filtered list of users as CSV or NDJSON."""
+
+    export_filename = "users"
 
-        q_objects = (
-            Q(first_name__icontains=value)
-            | Q(last_name__icontains=value)
-            | Q(email__icontains=value)
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+
+        queryset = self.filterset(request.GET, queryset=self.get_queryset()).qs
+        exporter, content_type = EXPORT_FORMATS[export_format]
+
+        response = StreamingHttpResponse(
+            exporter(queryset), content_type=content_type
+        )
+        response["Content-Disposition"] = 'attachment; filename="{}.{}"'.format(
+            self.export_filename, export_format
         )
+        return response
 
-        try:
-            val = uuid.UUID(value, version=4)
-            q_objects |= Q(uuid=val)
-        except ValueError:
-            pass
 
-        return queryset.filter(q_objects)
+class UserCursorPaginationMixin:
+    """
+    Paginate the list with cursors on the indexed (first_name, last_name, id)
+    tuple when `ACCOUNT_USER_LIST_CURSOR_PAGINATION` is enabled.
+
+    The page is then in the `cursor_page` context variable, `paginator` and
+    `page_obj` are `None`. Searches keep the page numbers, as the cursor can't
+    follow their relevance ordering.
+    """
+
+    cursor_ordering = ("first_name", "last_name", "id")
+
+    def use_cursor_pagination(self):
+        return settings.ACCOUNT_USER_LIST_CURSOR_PAGINATION and not (
+            self.request.GET.get("first_name", "").strip()
+        )
+
+    def get_paginate_by(self, queryset):
+        if settings.ACCOUNT_USER_LIST_CURSOR_PAGINATION:
+            return settings.ACCOUNT_USER_LIST_PAGE_SIZE
+        return super().get_paginate_by(queryset)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(
+            queryset,
+            ordering=self.cursor_ordering,
+            per_page=page_size,
+            count=settings.ACCOUNT_USER_LIST_APPROXIMATE_COUNT,
+        )
+        self.cursor_page = paginator.page(self.request.GET.get("cursor"))
+        return (None, None, self.cursor_page.object_list, False)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["cursor_page"] = getattr(self, "cursor_page", None)
+        return context
+
+
+class UserBulkActionMixin:
+    """
+    Apply an action to the users of the list, or to the selected ones.
+
+    The users are filtered with the list search and `visible_to()` for the
+    permission the action needs, then changed in bulk.
+    """
+
+    list_url_name = "account-admin:user-list"
+
+    actions = {
+        "activate": (bulk.activate_users, "account.change_user"),
+        "deactivate": (bulk.deactivate_users, "account.change_user"),
+        "invite": (bulk.invite_users, "account.change_user"),
+        "add_group": (bulk.add_users_to_group, "account.change_user"),
+        "remove_group": (bulk.remove_users_from_group, "account.change_user"),
+        "reset_two_factor": (bulk.reset_two_factor, "account.change_user"),
+        "delete": (bulk.delete_users, "account.delete_user"),
+    }
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponseRedirect(reverse(self.list_url_name))
+
+    def post(self, request, *args, **kwargs):
+        form = UserBulkActionForm(request.POST, user=request.user)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+            return self.redirect_to_list()
+
+        action = form.cleaned_data["action"]
+        function, permission = self.actions[action]
+
+        queryset = self.filterset(request.GET, queryset=self.get_queryset()).qs
+        queryset = queryset.visible_to(request.user, permission)
+        if form.cleaned_data["users"]:
+            queryset = queryset.filter(uuid__in=form.cleaned_data["users"])
+        if action in ["deactivate", "reset_two_factor", "delete"]:
+            # Never lock out or delete the current user
+            queryset = queryset.exclude(pk=request.user.pk)
+
+        if action in UserBulkActionForm.GROUP_ACTIONS:
+            count = function(queryset, form.cleaned_data["group"])
+        else:
+            count = function(queryset)
+
+        messages.success(
+            request,
+            _("%(action)s: %(count)s user(s) updated.")
+            % {
+                "action": dict(UserBulkActionForm.ACTION_CHOICES)[action],
+                "count": count,
+            },
+        )
+        return self.redirect_to_list()
+
+    def redirect_to_list(self):
+        url = reverse(self.list_url_name)
+        if self.request.GET:
+            url += "?" + self.request.GET.urlencode()
+        return HttpResponseRedirect(url)
+
 
+class UserBulkActionFormMixin:
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["bulk_action_form"] = UserBulkActionForm(user=self.request.user)
+        return context
 
-class UserList(AdminListView):
+
+class UserList(UserBulkActionFormMixin, UserCursorPaginationMixin, AdminListView):
     columns = (
         ("Name", "name"),
         ("Email", "email"),
@@ -87,10 +226,17 @@ class UserList(AdminListView):
     filterset = UserFilter
 
     def get_queryset(self):
-        return super().get_queryset().exclude(Q(is_staff=True) | Q(is_superuser=True))
+        return (
+            super()
+            .get_queryset()
+            .exclude(Q(is_staff=True) | Q(is_superuser=True))
+            .visible_to(self.request.user)
+        )
 
 
-class UserListStaff(AdminListView):
+class UserListStaff(
+    UserBulkActionFormMixin, UserCursorPaginationMixin, AdminListView
+):
     columns = (
         ("Name", "name"),
         ("Email", "email"),
@@ -114,7 +260,9 @@ class UserListStaff(AdminListView):
         return super().get_queryset().filter(is_staff=True).exclude(is_superuser=True)
 
 
-class UserListSuperuser(AdminListView):
+class UserListSuperuser(
+    UserBulkActionFormMixin, UserCursorPaginationMixin, AdminListView
+):
     columns = (
         ("Name", "name"),
         ("Email", "email"),
@@ -138,6 +286,30 @@ class UserListSuperuser(AdminListView):
         return super().get_queryset().filter(is_superuser=True)
 
 
+class UserExport(UserExportMixin, UserList):
+    pass
+
+
+class UserExportStaff(UserExportMixin, UserListStaff):
+    export_filename = "administrators"
+
+
+class UserExportSuperuser(UserExportMixin, UserListSuperuser):
+    export_filename = "superusers"
+
+
+class UserBulkAction(UserBulkActionMixin, UserList):
+    pass
+
+
+class UserBulkActionStaff(UserBulkActionMixin, UserListStaff):
+    list_url_name = "account-admin:user-list-staff"
+
+
+class UserBulkActionSuperuser(UserBulkActionMixin, UserListSuperuser):
+    list_url_name = "account-admin:user-list-superuser"
+
+
 class UserDetail(CheckUserMixin, AdminDetailView):
     model = User
     fieldsets = [
@@ -279,12 +451,13 @@ class UserUpdate(CheckUserMixin, AdminUpdateView):
     model = User
 
     def form_valid(self, form):
-        previous_instance = self.get_object()
+        # The instance is updated by the form, read the state it started with
+        was_active = form.initial.get("is_active", self.object.is_active)
         response = super().form_valid(form)
 
         # If `is_active` change state from False to True, send the invitation
         if (
-            not previous_instance.is_active
+            not was_active
             and self.object.is_active
             and self.object.is_staff
         ):
@@ -326,21 +499,9 @@ class UserInvite(CheckUserMixin, AdminUpdateView):
         return self.build_success_url()
 
 
-class UserDelete(AdminDeleteView):
+class UserDelete(CheckUserMixin, AdminDeleteView):
     model = User
-
-    def check_user(self, user):
-        obj = self.get_object()
-        if obj.is_superuser:
-            if user.is_superuser:
-                return True
-        elif obj.is_staff:
-            if user.is_superuser:
-                return True
-        elif user.is_staff and user.has_perm("account.delete_user"):
-            return True
-
-        return False
+    user_permission = "account.delete_user"
 
 
 class UserChangePassword(CheckUserMixin, AdminUpdateView):
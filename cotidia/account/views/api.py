@@ -1,5 +1,5 @@
-from django.db import transaction
-from django.contrib.auth import authenticate, login as auth_login
+from django.db import transaction, OperationalError
+from django.contrib.auth import login as auth_login
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
@@ -7,6 +7,7 @@ from django.contrib.auth.tokens import default_token_generator as token_generato
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
@@ -21,9 +22,24 @@ from cotidia.account.serializers import (
     ResetPasswordSerializer,
     SetPasswordSerializer,
     ChangePasswordSerializer,
+    UserAutocompleteSerializer,
+    BackupTokensSerializer,
 )
-from cotidia.account.models import User
+from cotidia.account.models import User, OutboxEmail
 from cotidia.account.notices import ResetPasswordNotice
+from cotidia.account.autocomplete import (
+    autocomplete,
+    statement_timeout,
+    is_query_cancelled,
+)
+from cotidia.account.otp import (
+    get_backup_tokens,
+    get_default_device_id,
+    regenerate_backup_tokens,
+)
+from cotidia.account.pagination import KeysetPaginator
+from cotidia.account.throttling import SignInThrottle, SignUpThrottle, EmailThrottle
+from cotidia.account.permissions import get_permission_groups
 
 
 class SignUp(APIView):
@@ -31,6 +47,7 @@ class SignUp(APIView):
 
     authentication_classes = ()
     permission_classes = ()
+    throttle_classes = (SignUpThrottle,)
     serializer_class = SignUpSerializer
     user_serializer_class = UserSerializer
 
@@ -75,6 +92,7 @@ class SignIn(APIView):
 
     authentication_classes = ()
     permission_classes = ()
+    throttle_classes = (SignInThrottle,)
     serializer_class = SignInTokenSerializer
     user_serializer_class = UserSerializer
     model = Token
@@ -96,20 +114,19 @@ class SignIn(APIView):
         serializer_class = self.get_serializer_class()
         user_serializer_class = self.get_user_serializer_class()
 
-        serializer = serializer_class(data=request.data)
+        serializer = serializer_class(data=request.data, context={"request": request})
 
         if serializer.is_valid():
 
-            user = authenticate(
-                username=serializer.data["email"], password=serializer.data["password"]
-            )
+            # The serializer already authenticated the user, reuse it rather
+            # than hashing the password a second time.
+            user = serializer.user
             auth_login(request, user)
 
             token, created = Token.objects.get_or_create(user=user)
 
             data = {"token": token.key}
-            user = user_serializer_class(token.user)
-            data.update(user.data)
+            data.update(user_serializer_class(user).data)
 
             return Response(data)
 
@@ -126,7 +143,7 @@ class Activate(APIView):
     def get(self, request, uuid, token):
 
         try:
-            user = User.objects.get(uuid=uuid)
+            user = User.objects.get_by_uuid(uuid)
         except User.DoesNotExist:
             return Response(
                 {"message": "USER_INVALID"}, status=status.HTTP_400_BAD_REQUEST
@@ -153,12 +170,13 @@ class ResendActivationLink(APIView):
     http_method_names = ["post"]
     authentication_classes = ()
     permission_classes = ()
+    throttle_classes = (EmailThrottle,)
 
     @transaction.atomic
     def post(self, request, uuid):
 
         try:
-            user = User.objects.get(uuid=uuid)
+            user = User.objects.get_by_uuid(uuid)
         except User.DoesNotExist:
             return Response(
                 {"message": "USER_INVALID"}, status=status.HTTP_400_BAD_REQUEST
@@ -214,6 +232,7 @@ class ResetPassword(APIView):
 
     authentication_classes = ()
     permission_classes = ()
+    throttle_classes = (EmailThrottle,)
 
     @transaction.atomic
     def post(self, request):
@@ -249,11 +268,11 @@ class ResetPassword(APIView):
                     },
                 )
 
-            notice = ResetPasswordNotice(
+            OutboxEmail.objects.send_notice(
+                ResetPasswordNotice,
                 recipients=["%s <%s>" % (user.get_full_name(), user.email)],
                 context={"url": url, "first_name": user.first_name},
             )
-            notice.send(force_now=True)
 
         return Response({"message": "PASSWORD_RESET"}, status=status.HTTP_200_OK)
 
@@ -268,7 +287,7 @@ class ResetPasswordValidate(APIView):
     def get(self, request, uuid, token):
 
         try:
-            user = User.objects.get(uuid=uuid)
+            user = User.objects.get_by_uuid(uuid)
         except User.DoesNotExist:
             return Response(
                 {"message": "USER_INVALID"}, status=status.HTTP_400_BAD_REQUEST
@@ -292,7 +311,7 @@ class SetPassword(APIView):
     def post(self, request, uuid, token):
 
         try:
-            user = User.objects.get(uuid=uuid)
+            user = User.objects.get_by_uuid(uuid)
         except User.DoesNotExist:
             return Response(
                 {"message": "USER_INVALID"}, status=status.HTTP_400_BAD_REQUEST
@@ -346,3 +365,86 @@ class ChangePassword(APIView):
         request.user.save()
 
         return Response({"message": "PASSWORD_CHANGED"}, status=status.HTTP_200_OK)
+
+
+class BackupTokens(APIView):
+    """Count or regenerate the two-factor backup tokens of the user."""
+
+    def get(self, request):
+        return Response(
+            {"count": len(get_backup_tokens(request.user))},
+            status=status.HTTP_200_OK,
+        )
+
+    def post(self, request):
+        if get_default_device_id(request.user) is None:
+            return Response(
+                {"message": "TWO_FACTOR_DISABLED"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = BackupTokensSerializer(
+            data=request.data, user=request.user, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        tokens = regenerate_backup_tokens(request.user)[1]
+
+        return Response({"tokens": tokens}, status=status.HTTP_200_OK)
+
+
+class UserAutocomplete(APIView):
+    """Find the users whose name or email words start with the query."""
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = UserAutocompleteSerializer
+    ordering = ("first_name", "last_name", "id")
+
+    def get_queryset(self):
+        return User.objects.only("id", "uuid", "first_name", "last_name", "email")
+
+    def get(self, request):
+        queryset = autocomplete(self.get_queryset(), request.GET.get("q", ""))
+        paginator = KeysetPaginator(
+            queryset,
+            ordering=self.ordering,
+            per_page=settings.ACCOUNT_AUTOCOMPLETE_PAGE_SIZE,
+        )
+
+        try:
+            with statement_timeout(settings.ACCOUNT_AUTOCOMPLETE_TIMEOUT):
+                page = paginator.page(request.GET.get("cursor"))
+        except OperationalError as e:
+            if not is_query_cancelled(e):
+                raise
+            return Response(
+                {"message": "QUERY_TIMEOUT"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        return Response(
+            {
+                "results": self.serializer_class(page.object_list, many=True).data,
+                "next": page.next_cursor,
+                "previous": page.previous_cursor,
+            }
+        )
+
+
+class PermissionList(APIView):
+    """List the permissions grouped by app and model, for the picker widget."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(
+            [
+                {
+                    "label": label,
+                    "permissions": [
+                        {"id": pk, "name": name} for pk, name in choices
+                    ],
+                }
+                for label, choices in get_permission_groups()
+            ]
+        )
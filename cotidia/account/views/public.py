@@ -1,7 +1,7 @@
 import hashlib
 
 from django.http import HttpResponseRedirect, Http404
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render
 from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.auth.decorators import login_required
@@ -11,8 +11,9 @@ from django.contrib.auth.views import (
 )
 from django.contrib.auth.views import LogoutView as AuthLogoutView
 from django.contrib.auth.tokens import default_token_generator
-from django.contrib.auth import authenticate, login as auth_login
+from django.contrib.auth import login as auth_login
 from django.contrib import messages
+from django.utils.decorators import method_decorator
 
 from cotidia.account.conf import settings
 
@@ -21,7 +22,8 @@ from cotidia.account.forms import (
     AccountUserCreationForm,
     EmailAuthenticationForm
 )
-from cotidia.account.models import User
+from cotidia.account.shortcuts import get_user_or_404
+from cotidia.account.throttling import throttle
 from cotidia.account import signals
 
 
@@ -54,6 +56,7 @@ def edit(
     return render(request, template_name, {'form': form})
 
 
+@method_decorator(throttle('sign_in', email_field='username'), name='dispatch')
 class LoginView(AuthLoginView):
     template_name = 'account/login.html'
     form_class = EmailAuthenticationForm
@@ -75,6 +78,7 @@ class LogoutView(AuthLogoutView):
     template_name = 'account/logout.html'
 
 
+@throttle('sign_up')
 def sign_up(
         request,
         sign_up_form=AccountUserCreationForm,
@@ -107,12 +111,11 @@ def sign_up(
                 user.is_active = False
                 user.save()
             else:
-                # Log the user straight away
-                new_user = authenticate(
-                    username=user.username,
-                    password=form.cleaned_data['password1']
+                # Log the user straight away, without hashing the password
+                # again (which may be refused under load)
+                auth_login(
+                    request, user, backend=settings.AUTHENTICATION_BACKENDS[0]
                 )
-                auth_login(request, new_user)
                 messages.success(
                     request, _('Your have successfully signed up'))
 
@@ -146,7 +149,7 @@ def sign_up(
 def activate(request, uuid, token, template_name):
     """Activate view for a public user who just signed up."""
 
-    user = get_object_or_404(User, uuid=uuid)
+    user = get_user_or_404(uuid)
 
     # Use PASSWORD_RESET_TIMEOUT_DAYS to set the confirmation date limit
     if default_token_generator.check_token(user, token):
@@ -168,7 +171,7 @@ def activate(request, uuid, token, template_name):
 def activation_pending(request, uuid, template_name):
     """Activation pending view for a public user."""
 
-    user = get_object_or_404(User, uuid=uuid)
+    user = get_user_or_404(uuid)
 
     if request.user.is_authenticated:
         return HttpResponseRedirect(reverse('account-public:dashboard'))
@@ -176,10 +179,11 @@ def activation_pending(request, uuid, template_name):
     return render(request, template_name, {"user": user})
 
 
+@throttle('email', methods=None)
 def resend_activation_link(request, uuid):
     """Resend the activation link for a user."""
 
-    user = get_object_or_404(User, uuid=uuid)
+    user = get_user_or_404(uuid)
     user.send_activation_link(app=False)
 
     messages.success(
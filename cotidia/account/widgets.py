@@ -1,9 +1,12 @@
 import re
 import datetime
 
+from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils.dates import MONTHS
-from django.forms.widgets import Widget, Select
+from django.forms.widgets import Widget, Select, CheckboxSelectMultiple
+
+from cotidia.account.conf import settings
 
 RE_DATE = re.compile(r'(\d{4})-(\d\d?)-(\d\d?)$')
 RE_TIME = re.compile(r'(\d\d?)?:(\d\d?)?$')
@@ -340,3 +343,45 @@ class SelectDateTimeWidget(Widget):
         if y and m and d and h and minute:
             return '%s-%s-%s %s:%s' % (y, m, d, int(h), int(minute))
         return data.get(name, None)
+
+
+class PermissionSelectMultiple(CheckboxSelectMultiple):
+    """Checkboxes grouped by app and model.
+
+    In lazy mode (`ACCOUNT_PERMISSION_PICKER_LAZY`), only the selected
+    permissions are rendered, as hidden inputs. The checkboxes are built by
+    `js/permission-picker.js` from the permission list API, so the size of the
+    form doesn't depend on the number of permissions.
+    """
+
+    lazy_template_name = "account/widgets/permission_select_lazy.html"
+
+    def __init__(self, attrs=None, choices=(), lazy=None):
+        super().__init__(attrs, choices)
+        self.lazy = lazy
+
+    def is_lazy(self):
+        if self.lazy is None:
+            return settings.ACCOUNT_PERMISSION_PICKER_LAZY
+        return self.lazy
+
+    def get_context(self, name, value, attrs):
+        if not self.is_lazy():
+            return super().get_context(name, value, attrs)
+
+        context = {
+            "widget": {
+                "name": name,
+                "value": self.format_value(value),
+                "attrs": self.build_attrs(self.attrs, attrs),
+                "template_name": self.lazy_template_name,
+            }
+        }
+        context["widget"]["url"] = reverse("account-api:permission-list")
+        return context
+
+    def render(self, name, value, attrs=None, renderer=None):
+        if not self.is_lazy():
+            return super().render(name, value, attrs, renderer)
+        context = self.get_context(name, value, attrs)
+        return self._render(self.lazy_template_name, context, renderer)